@@ -15,10 +15,14 @@ FastAPI app with endpoints:
 
 import os
 import re
+import json
 import time
 import random
 import logging
+import sqlite3
 import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, date
 from typing import Dict, List, Optional
 from contextlib import asynccontextmanager
@@ -28,6 +32,22 @@ from fastapi.responses import Response, PlainTextResponse
 from pydantic import BaseModel
 from playwright.sync_api import sync_playwright
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# orjson serializes multi-MB record batches several times faster than
+# stdlib json and emits bytes directly
+try:
+    import orjson
+
+    def _json_dumps(data) -> bytes:
+        return orjson.dumps(data)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data) -> bytes:
+        return json.dumps(data).encode()
+
+    _json_loads = json.loads
 
 # Logging
 logging.basicConfig(
@@ -73,11 +93,43 @@ BALANCE_FIELDS = {
     'related_account': 8,    # Reference to Bank Account
 }
 
+# Payload keys are the field IDs as strings - precompute them once so the
+# record-assembly loops don't call str() per field per row
+ACCOUNT_FIELD_KEYS = {k: str(v) for k, v in ACCOUNT_FIELDS.items()}
+TRANSACTION_FIELD_KEYS = {k: str(v) for k, v in TRANSACTION_FIELDS.items()}
+BALANCE_FIELD_KEYS = {k: str(v) for k, v in BALANCE_FIELDS.items()}
+
 # Bank Feed Refresh Settings
 REFRESH_POLL_INTERVAL = 15  # seconds between status checks
 REFRESH_TIMEOUT = 600       # max wait time (10 minutes)
 REFRESH_BROWSER_TIMEOUT = 600  # max wait for browser-based refresh (10 minutes)
 
+# Rows per QuickBase /records POST - each extra round trip is pure
+# overhead, so default high and let deployments tune it down if needed
+TXN_BATCH_SIZE = int(os.getenv('TXN_BATCH_SIZE', '5000'))
+
+# Optional text field in the Balances table holding "{account record
+# id}|{date}". When set, balance upserts merge on it and the
+# "already synced today" pre-check query is skipped entirely.
+BALANCE_COMPOSITE_KEY_FIELD = int(os.getenv('BALANCE_COMPOSITE_KEY_FIELD', '0'))
+
+# Local cache of the qboAccountId → Record ID# map, so warm runs skip
+# the full-table records/query round trip
+ACCOUNT_CACHE_DB = os.getenv('ACCOUNT_CACHE_DB', '.qb_sync_cache.db')
+ACCOUNT_CACHE_TTL = 24 * 3600  # seconds before a cached mapping goes stale
+
+# Strip non-digits from QB internal ids (ids look like '2867:ofx')
+_NONDIGIT = re.compile(r'\D')
+
+# Canonical ISO-8601 timestamp prefix as QB returns it
+_ISO_TS = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+
+# Chromium profile dir reused across runs (cookies survive restarts)
+BROWSER_PROFILE_DIR = os.getenv('BROWSER_PROFILE_DIR', '.qb_profile')
+
+# Saved session cookies - lets warm runs skip launching Chromium at all
+COOKIE_CACHE_FILE = os.getenv('COOKIE_CACHE_FILE', '.qb_cookies.json')
+
 # =============================================================================
 # In-memory state
 # =============================================================================
@@ -395,6 +447,30 @@ def human_delay(min_sec=1, max_sec=3):
     time.sleep(random.uniform(min_sec, max_sec))
 
 
+# Shared session so concurrent QuickBase calls reuse pooled keep-alive
+# connections instead of opening a socket per request. Pool is sized for
+# the thread-pool workers; idempotent requests retry with backoff on
+# transient statuses (POSTs are deliberately not auto-retried).
+def _pooled_session() -> requests.Session:
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ))
+    return session
+
+
+QUICKBASE_SESSION = _pooled_session()
+
+# Same deal for the QuickBooks scrape/refresh endpoints
+QB_SESSION = _pooled_session()
+
+
 def save_screenshot(screenshot_bytes: bytes):
     """Save screenshot to state."""
     state.latest_screenshot = screenshot_bytes
@@ -403,16 +479,22 @@ def save_screenshot(screenshot_bytes: bytes):
 
 
 def get_qb_headers(cookies: Dict[str, str]) -> tuple:
-    """Build standard QuickBooks API headers."""
+    """Build standard QuickBooks API headers.
+
+    Cookies go on the shared session's jar rather than a hand-built
+    Cookie header, so the transport layer handles them.
+    """
     company_id = cookies.get('qbo.currentcompanyid')
-    
+
+    for name, value in cookies.items():
+        QB_SESSION.cookies.set(name, value, domain='.intuit.com')
+
     headers = {
         'Accept': '*/*',
         'apiKey': QB_API_KEY,
         'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
         'authType': 'browser_auth',
         'Content-Type': 'application/json',
-        'Cookie': '; '.join(f'{k}={v}' for k, v in cookies.items()),
         'intuit-company-id': company_id,
         'Referer': f'{QB_BASE_URL}/app/banking',
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15',
@@ -452,7 +534,7 @@ def trigger_bank_update(cookies: Dict[str, str]) -> Optional[dict]:
         # The actual request body from browser capture
         body = {"fiList": []}
         
-        resp = requests.post(
+        resp = QB_SESSION.post(
             f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/start',
             headers=headers,
             json=body,
@@ -519,7 +601,7 @@ def poll_update_status(cookies: Dict[str, str], timeout: int = REFRESH_TIMEOUT)
             headers['intuit_tid'] = str(uuid.uuid4())
             
             # Get status by calling start again (returns current state)
-            resp = requests.post(
+            resp = QB_SESSION.post(
                 f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/start',
                 headers=headers,
                 json=body,
@@ -620,12 +702,61 @@ def run_bank_feeds_sync(skip_balances: bool = False, skip_transactions: bool = F
         raise
 
 
+def _save_cookies(cookies: Dict[str, str]):
+    """Persist session cookies for cookie-only warm starts."""
+    try:
+        with open(COOKIE_CACHE_FILE, 'w') as f:
+            json.dump(cookies, f)
+    except OSError as e:
+        logger.warning(f"Could not save cookies: {e}")
+
+
+def _load_valid_cookies() -> Optional[Dict[str, str]]:
+    """Load saved cookies and verify them with one cheap API probe.
+
+    Returns the cookie dict if the session is still live, else None.
+    """
+    try:
+        with open(COOKIE_CACHE_FILE) as f:
+            cookies = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    company_id = cookies.get('qbo.currentcompanyid')
+    if not company_id:
+        return None
+
+    headers, _ = get_qb_headers(cookies)
+    try:
+        resp = QB_SESSION.get(
+            f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getInitialData',
+            headers=headers,
+            timeout=10
+        )
+    except requests.exceptions.RequestException:
+        return None
+
+    if resp.status_code == 200:
+        logger.info("Saved session still valid - skipping browser login")
+        return cookies
+
+    logger.info(f"Saved session rejected ({resp.status_code}) - falling back to browser login")
+    return None
+
+
 def auto_login() -> Dict[str, str]:
-    """Login to QuickBooks via Playwright."""
+    """Login to QuickBooks via Playwright (skipped if saved cookies still work)."""
+    cookies = _load_valid_cookies()
+    if cookies:
+        return cookies
+
     logger.info("Starting Playwright login...")
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(
+        # Persistent profile keeps cookies/session state between runs, so
+        # warm starts skip the login form (and its CAPTCHA risk) entirely
+        context = p.chromium.launch_persistent_context(
+            BROWSER_PROFILE_DIR,
             headless=True,
             args=[
                 '--disable-blink-features=AutomationControlled',
@@ -633,10 +764,7 @@ def auto_login() -> Dict[str, str]:
                 '--no-sandbox',
                 '--disable-web-security',
                 '--window-size=1920,1080',
-            ]
-        )
-        
-        context = browser.new_context(
+            ],
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             viewport={'width': 1920, 'height': 1080},
             timezone_id='America/Denver',
@@ -649,6 +777,16 @@ def auto_login() -> Dict[str, str]:
             Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
             window.chrome = { runtime: {} };
         """)
+
+        # These pages are only visited to mint cookies / click Update -
+        # skip heavy assets (stylesheets stay: the UI must stay clickable
+        # and a CSS-less page looks bot-like)
+        context.route(
+            '**/*',
+            lambda route: route.abort()
+            if route.request.resource_type in ('image', 'font', 'media')
+            else route.continue_()
+        )
         
         page = context.new_page()
         
@@ -783,7 +921,8 @@ def auto_login() -> Dict[str, str]:
                     else:
                         raise Exception("SMS_VERIFICATION_TIMEOUT")
                 
-                elif 'captcha' in page_text or 'robot' in page_text:
+                # Targeted locator query - no substring scan over page text
+                elif page.locator('iframe[src*="captcha"], [id*="captcha"], [data-testid*="captcha"]').count() > 0:
                     raise Exception("CAPTCHA detected - wait and retry later")
                 else:
                     raise Exception(f"Login stuck at {page.url}")
@@ -796,8 +935,9 @@ def auto_login() -> Dict[str, str]:
         # Get cookies
         cookies = {c['name']: c['value'] for c in context.cookies() if 'intuit.com' in c.get('domain', '')}
         logger.info(f"Got session for company: {cookies.get('qbo.currentcompanyid')}")
+        _save_cookies(cookies)
         
-        browser.close()
+        context.close()
         return cookies
 
 
@@ -811,7 +951,10 @@ def auto_login_and_refresh(timeout: int = REFRESH_BROWSER_TIMEOUT) -> Dict[str,
     print("=== BROWSER-BASED BANK FEED REFRESH ===", flush=True)
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(
+        # Persistent profile keeps cookies/session state between runs, so
+        # warm starts skip the login form (and its CAPTCHA risk) entirely
+        context = p.chromium.launch_persistent_context(
+            BROWSER_PROFILE_DIR,
             headless=True,
             args=[
                 '--disable-blink-features=AutomationControlled',
@@ -819,10 +962,7 @@ def auto_login_and_refresh(timeout: int = REFRESH_BROWSER_TIMEOUT) -> Dict[str,
                 '--no-sandbox',
                 '--disable-web-security',
                 '--window-size=1920,1080',
-            ]
-        )
-        
-        context = browser.new_context(
+            ],
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             viewport={'width': 1920, 'height': 1080},
             timezone_id='America/Denver',
@@ -835,6 +975,16 @@ def auto_login_and_refresh(timeout: int = REFRESH_BROWSER_TIMEOUT) -> Dict[str,
             Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
             window.chrome = { runtime: {} };
         """)
+
+        # These pages are only visited to mint cookies / click Update -
+        # skip heavy assets (stylesheets stay: the UI must stay clickable
+        # and a CSS-less page looks bot-like)
+        context.route(
+            '**/*',
+            lambda route: route.abort()
+            if route.request.resource_type in ('image', 'font', 'media')
+            else route.continue_()
+        )
         
         page = context.new_page()
         
@@ -942,7 +1092,8 @@ def auto_login_and_refresh(timeout: int = REFRESH_BROWSER_TIMEOUT) -> Dict[str,
                             save_screenshot(page.screenshot())
                             raise Exception("SMS_VERIFICATION_TIMEOUT")
                     
-                elif 'captcha' in page_text.lower() or 'robot' in page_text.lower():
+                # Targeted locator query - no substring scan over page text
+                elif page.locator('iframe[src*="captcha"], [id*="captcha"], [data-testid*="captcha"]').count() > 0:
                     raise Exception("CAPTCHA detected - wait and retry later")
                 else:
                     raise Exception(f"Login stuck at {page.url}")
@@ -965,7 +1116,7 @@ def auto_login_and_refresh(timeout: int = REFRESH_BROWSER_TIMEOUT) -> Dict[str,
             else:
                 print("Could not find Update button - continuing without refresh", flush=True)
                 cookies = {c['name']: c['value'] for c in context.cookies() if 'intuit.com' in c.get('domain', '')}
-                browser.close()
+                context.close()
                 return cookies
         else:
             print("Clicking Update button...", flush=True)
@@ -1017,8 +1168,9 @@ def auto_login_and_refresh(timeout: int = REFRESH_BROWSER_TIMEOUT) -> Dict[str,
         
         cookies = {c['name']: c['value'] for c in context.cookies() if 'intuit.com' in c.get('domain', '')}
         logger.info(f"Got session for company: {cookies.get('qbo.currentcompanyid')}")
+        _save_cookies(cookies)
         
-        browser.close()
+        context.close()
         return cookies
 
 
@@ -1027,13 +1179,17 @@ def scrape_quickbooks(cookies: Dict[str, str]):
     logger.info("Scraping QuickBooks...")
     
     company_id = cookies.get('qbo.currentcompanyid')
+
+    # Cookies ride the shared session jar (see get_qb_headers)
+    for name, value in cookies.items():
+        QB_SESSION.cookies.set(name, value, domain='.intuit.com')
+
     headers = {
         'Accept': '*/*',
         'apiKey': QB_API_KEY,
         'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
         'authType': 'browser_auth',
         'Content-Type': 'application/json',
-        'Cookie': '; '.join(f'{k}={v}' for k, v in cookies.items()),
         'intuit-company-id': company_id,
         'Referer': f'{QB_BASE_URL}/app/banking',
     }
@@ -1041,95 +1197,185 @@ def scrape_quickbooks(cookies: Dict[str, str]):
         headers['Csrftoken'] = cookies['qbo.csrftoken']
     
     # Accounts
-    resp = requests.get(
+    resp = QB_SESSION.get(
         f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getInitialData',
         headers=headers, timeout=30
     )
     if resp.status_code != 200:
         raise Exception(f"Failed to get accounts: {resp.status_code}")
     
-    accounts = resp.json().get('accounts', [])
+    # Decode straight from bytes - avoids requests' charset detection
+    accounts = _json_loads(resp.content).get('accounts', [])
     logger.info(f"Found {len(accounts)} accounts")
     
-    # Transactions
-    all_txns = []
-    for acct in accounts:
+    # Transactions - per-account fetches are independent, so overlap the
+    # network round trips (bounded to stay polite to the QB API host)
+    txn_headers = {**headers, 'X-Range': 'items=0-499'}
+
+    def fetch_txns(acct):
         acct_id = str(acct.get('qboAccountId', ''))
-        
-        resp = requests.get(
+        # Nothing pending - skip the round trip entirely
+        if not int(acct.get('numTxnToReview', 0) or 0):
+            return acct_id, []
+        resp = QB_SESSION.get(
             f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getTransactions',
             params={'accountId': acct_id, 'sort': '-txnDate', 'reviewState': 'PENDING', 'ignoreMatching': 'false'},
-            headers={**headers, 'X-Range': 'items=0-499'},
+            headers=txn_headers,
             timeout=30
         )
         if resp.status_code != 200:
-            continue
-        
-        for item in resp.json().get('items', []):
-            amount = float(item.get('amount', 0))
-            all_txns.append({
-                'id': item.get('id', ''),
-                'olb_txn_id': str(item.get('olbTxnId', '')),
-                'date': item.get('olbTxnDate', '')[:10] if item.get('olbTxnDate') else '',
-                'description': item.get('description', ''),
-                'amount': abs(amount),
-                'type': 'Expense' if amount < 0 else 'Income',
-                'account_id': acct_id,
-                'merchant_name': item.get('merchantName', ''),
-            })
-    
+            return acct_id, []
+        return acct_id, _json_loads(resp.content).get('items', [])
+
+    all_txns = []
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        # map() keeps account order, so output stays deterministic
+        for acct_id, items in pool.map(fetch_txns, accounts):
+            for item in items:
+                amount = float(item.get('amount', 0))
+                all_txns.append({
+                    'id': item.get('id', ''),
+                    'olb_txn_id': str(item.get('olbTxnId', '')),
+                    'date': item.get('olbTxnDate', '')[:10] if item.get('olbTxnDate') else '',
+                    'description': item.get('description', ''),
+                    'amount': abs(amount),
+                    'type': 'Expense' if amount < 0 else 'Income',
+                    'account_id': acct_id,
+                    'merchant_name': item.get('merchantName', ''),
+                })
+
     logger.info(f"Found {len(all_txns)} transactions")
     return accounts, all_txns
 
 
+# Bounds in-flight QuickBase calls so the parallel upserts can't burst
+# past the per-realm quota
+_QUICKBASE_SLOTS = threading.Semaphore(8)
+
+
 def quickbase_request(method: str, endpoint: str, data: dict = None):
-    """Make QuickBase API request."""
+    """Make QuickBase API request (rate-limit aware)."""
     print(f"QuickBase API: {method} {endpoint}", flush=True)
-    resp = requests.request(
-        method,
-        f'https://api.quickbase.com/v1/{endpoint}',
-        headers={
-            'QB-Realm-Hostname': f'{QUICKBASE_REALM}.quickbase.com',
-            'Authorization': f'QB-USER-TOKEN {QUICKBASE_TOKEN}',
-            'Content-Type': 'application/json',
-        },
-        json=data,
-        timeout=30
-    )
+    body = _json_dumps(data) if data is not None else None
+
+    with _QUICKBASE_SLOTS:
+        for attempt in range(3):
+            resp = QUICKBASE_SESSION.request(
+                method,
+                f'https://api.quickbase.com/v1/{endpoint}',
+                headers={
+                    'QB-Realm-Hostname': f'{QUICKBASE_REALM}.quickbase.com',
+                    'Authorization': f'QB-USER-TOKEN {QUICKBASE_TOKEN}',
+                    'Content-Type': 'application/json',
+                },
+                data=body,
+                timeout=30
+            )
+            if resp.status_code != 429:
+                break
+            # Honor the server's pacing (urllib3's Retry only auto-retries
+            # idempotent methods, so 429'd POSTs land here)
+            retry_after = float(resp.headers.get('Retry-After') or 1)
+            print(f"QuickBase rate limited - retrying in {retry_after}s", flush=True)
+            time.sleep(retry_after)
+
+    remaining = resp.headers.get('X-Ratelimit-Remaining')
+    if remaining is not None and remaining.isdigit() and int(remaining) == 0:
+        # Quota exhausted - pause before the next call goes out
+        time.sleep(float(resp.headers.get('Retry-After') or 1))
+
     print(f"QuickBase response: {resp.status_code}", flush=True)
     if resp.status_code not in [200, 207]:
         print(f"QuickBase error: {resp.text[:500]}", flush=True)
     return resp
 
 
+def _account_cache() -> sqlite3.Connection:
+    """Open the local account-map cache, creating the table on first use."""
+    conn = sqlite3.connect(ACCOUNT_CACHE_DB)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS account_map('
+        'qb_id TEXT PRIMARY KEY, record_id INTEGER, updated REAL)'
+    )
+    return conn
+
+
+def _cached_account_map() -> Dict[str, int]:
+    """Load the qboAccountId → Record ID# map from cache (TTL-filtered)."""
+    try:
+        conn = _account_cache()
+        try:
+            cutoff = time.time() - ACCOUNT_CACHE_TTL
+            return dict(conn.execute(
+                'SELECT qb_id, record_id FROM account_map WHERE updated > ?',
+                (cutoff,)
+            ))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Account cache read failed: {e}")
+        return {}
+
+
+def _store_account_map(account_map: Dict[str, int]):
+    """Persist the account map so warm runs skip the records/query call."""
+    try:
+        conn = _account_cache()
+        try:
+            now = time.time()
+            conn.executemany(
+                'INSERT OR REPLACE INTO account_map VALUES (?, ?, ?)',
+                [(qb_id, record_id, now) for qb_id, record_id in account_map.items()]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Account cache write failed: {e}")
+
+
+def _make_account_record(
+    a, now,
+    # Field keys bound once at import - the per-account call does no
+    # ACCOUNT_FIELD_KEYS lookups at all
+    _qb_id=ACCOUNT_FIELD_KEYS['quickbooks_id'],
+    _name=ACCOUNT_FIELD_KEYS['account_name'],
+    _nick=ACCOUNT_FIELD_KEYS['nickname'],
+    _inst=ACCOUNT_FIELD_KEYS['institution'],
+    _type=ACCOUNT_FIELD_KEYS['type'],
+    _bal=ACCOUNT_FIELD_KEYS['balance'],
+    _qb_bal=ACCOUNT_FIELD_KEYS['qb_balance'],
+    _pending=ACCOUNT_FIELD_KEYS['pending_txns'],
+    _updated=ACCOUNT_FIELD_KEYS['last_updated'],
+    _synced=ACCOUNT_FIELD_KEYS['last_synced'],
+) -> dict:
+    """Build one account upsert record."""
+    # QB already returns canonical ISO-8601; a prefix check + slice
+    # replaces the fromisoformat/strftime round trip per account
+    last_updated = a.get('lastUpdateTime', '')
+    last_updated = last_updated[:19] + 'Z' if _ISO_TS.match(last_updated) else ''
+
+    return {
+        _qb_id: {'value': int(a.get('qboAccountId', 0))},
+        _name: {'value': a.get('qboAccountFullName', '')},
+        _nick: {'value': a.get('olbAccountNickname', '')},
+        _inst: {'value': a.get('fiName', '')},
+        _type: {'value': a.get('qboAccountType', '').replace('&amp;', '&')},
+        _bal: {'value': float(a.get('bankBalance', 0) or 0)},
+        _qb_bal: {'value': float(a.get('qboBalance', 0) or 0)},
+        _pending: {'value': str(a.get('numTxnToReview', 0))},
+        _updated: {'value': last_updated},
+        _synced: {'value': now},
+    }
+
+
 def sync_accounts(accounts: List) -> Dict[str, int]:
     """Sync accounts to QuickBase."""
     logger.info("Syncing accounts...")
     now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
-    
-    records = []
-    for a in accounts:
-        last_updated = a.get('lastUpdateTime', '')
-        if last_updated:
-            try:
-                parsed = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                last_updated = parsed.strftime('%Y-%m-%dT%H:%M:%SZ')
-            except:
-                last_updated = ''
-        
-        records.append({
-            str(ACCOUNT_FIELDS['quickbooks_id']): {'value': int(a.get('qboAccountId', 0))},
-            str(ACCOUNT_FIELDS['account_name']): {'value': a.get('qboAccountFullName', '')},
-            str(ACCOUNT_FIELDS['nickname']): {'value': a.get('olbAccountNickname', '')},
-            str(ACCOUNT_FIELDS['institution']): {'value': a.get('fiName', '')},
-            str(ACCOUNT_FIELDS['type']): {'value': a.get('qboAccountType', '').replace('&amp;', '&')},
-            str(ACCOUNT_FIELDS['balance']): {'value': float(a.get('bankBalance', 0) or 0)},
-            str(ACCOUNT_FIELDS['qb_balance']): {'value': float(a.get('qboBalance', 0) or 0)},
-            str(ACCOUNT_FIELDS['pending_txns']): {'value': str(a.get('numTxnToReview', 0))},
-            str(ACCOUNT_FIELDS['last_updated']): {'value': last_updated},
-            str(ACCOUNT_FIELDS['last_synced']): {'value': now},
-        })
-    
+
+    records = [_make_account_record(a, now) for a in accounts]
+
     resp = quickbase_request('POST', 'records', {
         'to': ACCOUNTS_TABLE_ID,
         'data': records,
@@ -1140,24 +1386,32 @@ def sync_accounts(accounts: List) -> Dict[str, int]:
     # Build mapping
     account_map = {}
     if resp.status_code == 200:
-        for record in resp.json().get('data', []):
-            qb_id = record.get(str(ACCOUNT_FIELDS['quickbooks_id']), {}).get('value')
+        for record in _json_loads(resp.content).get('data', []):
+            qb_id = record.get(ACCOUNT_FIELD_KEYS['quickbooks_id'], {}).get('value')
             record_id = record.get('3', {}).get('value')
             if qb_id is not None and record_id:
                 account_map[str(int(qb_id))] = record_id
-    
-    # Get full mapping
-    resp = quickbase_request('POST', 'records/query', {
-        'from': ACCOUNTS_TABLE_ID,
-        'select': [3, ACCOUNT_FIELDS['quickbooks_id']],
-    })
-    if resp.status_code == 200:
-        for record in resp.json().get('data', []):
-            qb_id = record.get(str(ACCOUNT_FIELDS['quickbooks_id']), {}).get('value')
-            record_id = record.get('3', {}).get('value')
-            if qb_id is not None and record_id:
-                account_map[str(int(qb_id))] = record_id
-    
+
+    # Fill gaps from the local cache before falling back to QuickBase
+    for qb_id, record_id in _cached_account_map().items():
+        account_map.setdefault(qb_id, record_id)
+
+    # Only pay for the full-table query if a scraped account is still unmapped
+    needed = {str(int(a.get('qboAccountId', 0))) for a in accounts}
+    if not needed.issubset(account_map):
+        resp = quickbase_request('POST', 'records/query', {
+            'from': ACCOUNTS_TABLE_ID,
+            'select': [3, ACCOUNT_FIELDS['quickbooks_id']],
+        })
+        if resp.status_code == 200:
+            for record in _json_loads(resp.content).get('data', []):
+                qb_id = record.get(ACCOUNT_FIELD_KEYS['quickbooks_id'], {}).get('value')
+                record_id = record.get('3', {}).get('value')
+                if qb_id is not None and record_id:
+                    account_map[str(int(qb_id))] = record_id
+
+    _store_account_map(account_map)
+
     logger.info(f"Mapped {len(account_map)} accounts")
     return account_map
 
@@ -1177,69 +1431,76 @@ def sync_bank_balances(accounts: List, account_map: Dict[str, int]) -> str:
     
     today = date.today().isoformat()  # YYYY-MM-DD format
     
-    records = []
-    skipped = 0
-    
-    for acct in accounts:
-        acct_id = str(acct.get('qboAccountId', ''))
-        parent_record_id = account_map.get(acct_id)
-        
-        if not parent_record_id:
-            skipped += 1
-            continue
-        
-        # Get balance (prefer bank balance, fall back to QB balance)
-        balance = float(acct.get('bankBalance', 0) or 0)
-        if balance == 0:
-            balance = float(acct.get('qboBalance', 0) or 0)
-        
-        records.append({
-            str(BALANCE_FIELDS['balance']): {'value': balance},
-            str(BALANCE_FIELDS['date_added']): {'value': today},
-            str(BALANCE_FIELDS['related_account']): {'value': parent_record_id},
-        })
-    
+    # Single comprehension sizes the list in one pass; balance prefers the
+    # bank figure and falls back to the QB figure when it's zero
+    records = [
+        {
+            BALANCE_FIELD_KEYS['balance']: {
+                'value': float(acct.get('bankBalance', 0) or 0) or float(acct.get('qboBalance', 0) or 0)
+            },
+            BALANCE_FIELD_KEYS['date_added']: {'value': today},
+            BALANCE_FIELD_KEYS['related_account']: {'value': parent_record_id},
+        }
+        for acct in accounts
+        if (parent_record_id := account_map.get(str(acct.get('qboAccountId', ''))))
+    ]
+    skipped = len(accounts) - len(records)
+
     if skipped:
         logger.info(f"Skipped {skipped} accounts (no matching parent)")
-    
+
     if not records:
         return "no records"
-    
-    # Check for existing balances for today
-    logger.info(f"Checking for existing balances on {today}...")
-    
-    existing_check = quickbase_request('POST', 'records/query', {
-        'from': BALANCES_TABLE_ID,
-        'select': [3, BALANCE_FIELDS['date_added'], BALANCE_FIELDS['related_account']],
-        'where': f"{{{BALANCE_FIELDS['date_added']}.EX.'{today}'}}"
-    })
-    
-    existing_accounts = set()
-    if existing_check.status_code == 200:
-        for rec in existing_check.json().get('data', []):
-            acct_ref = rec.get(str(BALANCE_FIELDS['related_account']), {}).get('value')
-            if acct_ref:
-                existing_accounts.add(acct_ref)
-    
-    if existing_accounts:
-        logger.info(f"Found {len(existing_accounts)} existing balance records for today")
-        original_count = len(records)
-        records = [
-            r for r in records 
-            if r[str(BALANCE_FIELDS['related_account'])]['value'] not in existing_accounts
-        ]
-        logger.info(f"Filtered to {len(records)} new balance records")
-    
-    if not records:
-        return "already synced today"
-    
-    # Insert balance records
-    logger.info(f"Inserting {len(records)} balance snapshot records...")
-    
-    resp = quickbase_request('POST', 'records', {
-        'to': BALANCES_TABLE_ID,
-        'data': records,
-    })
+
+    if BALANCE_COMPOSITE_KEY_FIELD:
+        # Merge on the "{account record id}|{date}" key - re-runs dedupe
+        # server-side in the same POST, no pre-check query needed
+        key_field = str(BALANCE_COMPOSITE_KEY_FIELD)
+        related_key = BALANCE_FIELD_KEYS['related_account']
+        for r in records:
+            r[key_field] = {'value': f"{r[related_key]['value']}|{today}"}
+
+        logger.info(f"Upserting {len(records)} balance snapshot records...")
+        resp = quickbase_request('POST', 'records', {
+            'to': BALANCES_TABLE_ID,
+            'data': records,
+            'mergeFieldId': BALANCE_COMPOSITE_KEY_FIELD,
+        })
+    else:
+        # Check for existing balances for today
+        logger.info(f"Checking for existing balances on {today}...")
+
+        existing_check = quickbase_request('POST', 'records/query', {
+            'from': BALANCES_TABLE_ID,
+            'select': [3, BALANCE_FIELDS['date_added'], BALANCE_FIELDS['related_account']],
+            'where': f"{{{BALANCE_FIELDS['date_added']}.EX.'{today}'}}"
+        })
+
+        existing_accounts = set()
+        if existing_check.status_code == 200:
+            for rec in _json_loads(existing_check.content).get('data', []):
+                acct_ref = rec.get(BALANCE_FIELD_KEYS['related_account'], {}).get('value')
+                if acct_ref:
+                    existing_accounts.add(acct_ref)
+
+        if existing_accounts:
+            logger.info(f"Found {len(existing_accounts)} existing balance records for today")
+            records = [
+                r for r in records
+                if r[BALANCE_FIELD_KEYS['related_account']]['value'] not in existing_accounts
+            ]
+            logger.info(f"Filtered to {len(records)} new balance records")
+
+        if not records:
+            return "already synced today"
+
+        # Insert balance records
+        logger.info(f"Inserting {len(records)} balance snapshot records...")
+
+        resp = quickbase_request('POST', 'records', {
+            'to': BALANCES_TABLE_ID,
+            'data': records,
+        })
     
     if resp.status_code == 200:
         meta = resp.json().get('metadata', {})
@@ -1255,43 +1516,55 @@ def sync_transactions(transactions: List, account_map: Dict[str, int]):
     """Sync transactions to QuickBase."""
     logger.info("Syncing transactions...")
     
-    records = []
+    def internal_id(raw) -> int:
+        # regex sub runs in C - no per-character Python generator
+        return int(_NONDIGIT.sub('', str(raw).split(':', 1)[0]) or '0') if raw else 0
+
+    # Bucket by account first - one map lookup per account instead of a
+    # str() + .get() per transaction
+    by_acct = defaultdict(list)
     for t in transactions:
-        parent_id = account_map.get(str(t['account_id']))
-        if not parent_id:
-            continue
-        
-        internal_id = t['id']
-        if internal_id:
-            numeric = ''.join(c for c in str(internal_id).split(':')[0] if c.isdigit())
-            internal_id = int(numeric) if numeric else 0
-        else:
-            internal_id = 0
-        
-        records.append({
-            str(TRANSACTION_FIELDS['quickbooks_id']): {'value': t['olb_txn_id']},
-            str(TRANSACTION_FIELDS['internal_id']): {'value': internal_id},
-            str(TRANSACTION_FIELDS['date']): {'value': t['date']},
-            str(TRANSACTION_FIELDS['description']): {'value': t['description']},
-            str(TRANSACTION_FIELDS['amount']): {'value': t['amount']},
-            str(TRANSACTION_FIELDS['type']): {'value': t['type']},
-            str(TRANSACTION_FIELDS['merchant_name']): {'value': t['merchant_name']},
-            str(TRANSACTION_FIELDS['related_account']): {'value': parent_id},
-        })
+        by_acct[str(t['account_id'])].append(t)
+
+    records = [
+        {
+            TRANSACTION_FIELD_KEYS['quickbooks_id']: {'value': t['olb_txn_id']},
+            TRANSACTION_FIELD_KEYS['internal_id']: {'value': internal_id(t['id'])},
+            TRANSACTION_FIELD_KEYS['date']: {'value': t['date']},
+            TRANSACTION_FIELD_KEYS['description']: {'value': t['description']},
+            TRANSACTION_FIELD_KEYS['amount']: {'value': t['amount']},
+            TRANSACTION_FIELD_KEYS['type']: {'value': t['type']},
+            TRANSACTION_FIELD_KEYS['merchant_name']: {'value': t['merchant_name']},
+            TRANSACTION_FIELD_KEYS['related_account']: {'value': parent_id},
+        }
+        for acct_id, parent_id in account_map.items()
+        for t in by_acct.get(acct_id, ())
+    ]
     
     if not records:
         logger.info("No transactions to sync")
         return
     
-    # Batch upsert
-    for i in range(0, len(records), 1000):
-        batch = records[i:i + 1000]
-        quickbase_request('POST', 'records', {
+    # Batch upsert - batches are independent, so dispatch them
+    # concurrently (bounded to respect QuickBase per-realm rate limits)
+    def upsert_batch(batch):
+        resp = quickbase_request('POST', 'records', {
             'to': TRANSACTIONS_TABLE_ID,
             'data': batch,
             'mergeFieldId': TRANSACTION_FIELDS['quickbooks_id'],
         })
-    
+        # Payload too large - bisect and retry each half
+        if resp.status_code == 413 and len(batch) > 1:
+            mid = len(batch) // 2
+            upsert_batch(batch[:mid])
+            upsert_batch(batch[mid:])
+        return resp
+
+    batch_size = TXN_BATCH_SIZE
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(upsert_batch, batches))
+
     logger.info(f"Synced {len(records)} transactions")
 
 
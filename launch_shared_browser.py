@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Shared Browser Launcher
+
+Starts one long-lived Chromium with a CDP debugging port so multiple
+automation jobs on the same host (qb_auto_login, test_stealth, scheduled
+runners) can attach to it instead of each paying a full browser launch.
+
+Usage:
+    python launch_shared_browser.py [--port 9222] [--visible]
+
+    # In the worker processes:
+    export QB_CDP_WS=http://127.0.0.1:9222
+
+Workers connecting over CDP only open/close contexts; stopping this
+process (Ctrl+C) shuts the browser down for everyone.
+"""
+
+import sys
+import time
+import argparse
+
+from playwright.sync_api import sync_playwright
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Launch a shared Chromium for CDP workers')
+    parser.add_argument('--port', type=int, default=9222,
+                        help='CDP debugging port (default: 9222)')
+    parser.add_argument('--visible', action='store_true',
+                        help='Run with a visible window instead of headless')
+    args = parser.parse_args()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(
+            headless=not args.visible,
+            args=[
+                f'--remote-debugging-port={args.port}',
+                '--disable-blink-features=AutomationControlled',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+                '--disable-background-networking',
+                '--disable-extensions',
+            ]
+        )
+        print(f'Shared browser ready on http://127.0.0.1:{args.port}')
+        print(f'Workers: export QB_CDP_WS=http://127.0.0.1:{args.port}')
+        try:
+            while browser.is_connected():
+                time.sleep(5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            browser.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,6 +30,7 @@ import os
 import sys
 import json
 import time
+import atexit
 import logging
 import argparse
 from datetime import datetime, timezone
@@ -45,6 +46,10 @@ STATE_FILE = SESSION_DIR / 'state.json'
 QB_LOGIN_URL = 'https://qbo.intuit.com'
 QB_BANKING_URL = 'https://qbo.intuit.com/app/banking'
 
+# Optional shared browser endpoint (see launch_shared_browser.py). When set,
+# connect over CDP instead of launching our own chromium.
+CDP_ENDPOINT = os.getenv('QB_CDP_WS')
+
 # Credentials from environment
 QB_USERNAME = os.getenv('QB_USERNAME')
 QB_PASSWORD = os.getenv('QB_PASSWORD')
@@ -59,28 +64,72 @@ logger = logging.getLogger(__name__)
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 SESSION_DIR.mkdir(parents=True, exist_ok=True)
 
+# Module-level browser shared across QBAutoLogin uses - Chromium launch
+# costs seconds, so one warm instance serves every login/check in the
+# process. Each use still gets a fresh context (cookies come from
+# STATE_FILE, which outlives the process).
+_PW = None
+_BROWSER = None
+_BROWSER_HEADLESS = None
+
+
+def _shutdown_browser():
+    global _PW, _BROWSER
+    if _BROWSER is not None:
+        try:
+            _BROWSER.close()
+        except Exception:
+            pass
+        _BROWSER = None
+    if _PW is not None:
+        try:
+            _PW.stop()
+        except Exception:
+            pass
+        _PW = None
+
+
+def _get_browser(headless: bool):
+    """Launch Chromium once and reuse it; relaunch only if the headless
+    mode changes"""
+    global _PW, _BROWSER, _BROWSER_HEADLESS
+    if _BROWSER is not None and _BROWSER_HEADLESS != headless and not CDP_ENDPOINT:
+        _shutdown_browser()
+    if _BROWSER is None:
+        if _PW is None:
+            _PW = sync_playwright().start()
+            atexit.register(_shutdown_browser)
+        if CDP_ENDPOINT:
+            # Shared browser owns its own lifecycle; close() here only
+            # disconnects the CDP session.
+            _BROWSER = _PW.chromium.connect_over_cdp(CDP_ENDPOINT)
+            _BROWSER_HEADLESS = headless
+            return _BROWSER
+        _BROWSER = _PW.chromium.launch(
+            headless=headless,
+            args=[
+                '--disable-blink-features=AutomationControlled',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+                '--disable-background-networking',
+                '--disable-extensions',
+            ]
+        )
+        _BROWSER_HEADLESS = headless
+    return _BROWSER
+
 
 class QBAutoLogin:
     """Automated QuickBooks login handler"""
     
     def __init__(self, headless: bool = True):
         self.headless = headless
-        self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
     
     def __enter__(self):
-        self.playwright = sync_playwright().start()
-        
-        # Use persistent context for more browser-like behavior
-        self.browser = self.playwright.chromium.launch(
-            headless=self.headless,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-            ]
-        )
+        self.browser = _get_browser(self.headless)
         
         # Try to load existing session
         if STATE_FILE.exists():
@@ -98,16 +147,22 @@ class QBAutoLogin:
                 user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15'
             )
         
+        # The login flow only needs the DOM and scripts - drop images,
+        # media and fonts at the network layer to cut page weight and RSS
+        self.context.route(
+            '**/*',
+            lambda route: route.abort()
+            if route.request.resource_type in ('image', 'media', 'font')
+            else route.continue_())
+        
         self.page = self.context.new_page()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        # Close only our context - the shared browser stays warm for the
+        # next use and is torn down at process exit
         if self.context:
             self.context.close()
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
     
     def save_session(self):
         """Save current session state"""
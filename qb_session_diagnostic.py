@@ -30,6 +30,18 @@ STATE_FILE = SESSION_DIR / 'state.json'
 QB_API_KEY = 'prdakyresxaDrhFXaSARXaUdj1S8M7h6YK7YGekc'
 QB_BASE_URL = 'https://qbo.intuit.com'
 
+# Cookies we care about for session lifetime (frozenset = O(1) membership)
+KEY_COOKIES = frozenset(('qbo.ticket', 'qbo.tkt', 'qbo.csrftoken', 'ius_session', 'qbn.ticket'))
+
+# Headers that never change between requests - build once at import
+BASE_HEADERS = {
+    'Accept': '*/*',
+    'apiKey': QB_API_KEY,
+    'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
+    'authType': 'browser_auth',
+    'Referer': f'{QB_BASE_URL}/app/banking',
+}
+
 
 def load_session():
     """Load session and return parsed data"""
@@ -37,31 +49,48 @@ def load_session():
         return json.load(f)
 
 
+def build_cookie_dict(state: dict) -> dict:
+    """Build name→value dict of intuit.com cookies from session state.
+
+    Single-pass dict comprehension; endswith() is a C-level suffix match,
+    cheaper than the 'in' substring scan per cookie.
+    """
+    return {
+        c['name']: c['value']
+        for c in state.get('cookies', ())
+        if c.get('domain', '').endswith('intuit.com')
+    }
+
+
+def _is_key_cookie(name: str) -> bool:
+    """Match session-relevant cookies (startswith with a tuple is one C call)"""
+    return name in KEY_COOKIES or name.startswith(('qbo.', 'qbn.'))
+
+
+def _expiry_info(expires: float) -> dict:
+    """Build expiry details for a single cookie"""
+    if expires > 0:
+        exp_dt = datetime.fromtimestamp(expires, timezone.utc)
+        remaining = exp_dt - datetime.now(timezone.utc)
+        return {
+            'expires': exp_dt.isoformat(),
+            'remaining_days': remaining.days,
+            'remaining_hours': remaining.total_seconds() / 3600
+        }
+    return {
+        'expires': 'session (no expiry set)',
+        'remaining_days': None,
+        'remaining_hours': None
+    }
+
+
 def get_cookie_expiry(state: dict) -> dict:
     """Extract expiration info for key cookies"""
-    results = {}
-    key_cookies = ['qbo.ticket', 'qbo.tkt', 'qbo.csrftoken', 'ius_session', 'qbn.ticket']
-    
-    for cookie in state.get('cookies', []):
-        name = cookie.get('name', '')
-        if name in key_cookies or name.startswith('qbo.') or name.startswith('qbn.'):
-            expires = cookie.get('expires', -1)
-            if expires > 0:
-                exp_dt = datetime.fromtimestamp(expires, timezone.utc)
-                remaining = exp_dt - datetime.now(timezone.utc)
-                results[name] = {
-                    'expires': exp_dt.isoformat(),
-                    'remaining_days': remaining.days,
-                    'remaining_hours': remaining.total_seconds() / 3600
-                }
-            else:
-                results[name] = {
-                    'expires': 'session (no expiry set)',
-                    'remaining_days': None,
-                    'remaining_hours': None
-                }
-    
-    return results
+    return {
+        cookie['name']: _expiry_info(cookie.get('expires', -1))
+        for cookie in state.get('cookies', ())
+        if _is_key_cookie(cookie.get('name', ''))
+    }
 
 
 def test_api_refresh():
@@ -71,24 +100,14 @@ def test_api_refresh():
     print("="*60)
     
     state = load_session()
-    
-    # Build cookies
-    cookies = {}
-    for cookie in state.get('cookies', []):
-        if 'intuit.com' in cookie.get('domain', ''):
-            cookies[cookie['name']] = cookie['value']
-    
+    cookies = build_cookie_dict(state)
     company_id = cookies.get('qbo.currentcompanyid')
     
     # Headers
     headers = {
-        'Accept': '*/*',
-        'apiKey': QB_API_KEY,
-        'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
-        'authType': 'browser_auth',
+        **BASE_HEADERS,
         'Content-Type': 'application/json',
         'intuit-company-id': company_id,
-        'Referer': f'{QB_BASE_URL}/app/banking',
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15',
     }
     
@@ -209,20 +228,12 @@ def monitor_session(interval_minutes=60, duration_hours=24):
     print("Press Ctrl+C to stop\n")
     
     state = load_session()
-    cookies = {}
-    for cookie in state.get('cookies', []):
-        if 'intuit.com' in cookie.get('domain', ''):
-            cookies[cookie['name']] = cookie['value']
-    
+    cookies = build_cookie_dict(state)
     company_id = cookies.get('qbo.currentcompanyid')
     
     headers = {
-        'Accept': '*/*',
-        'apiKey': QB_API_KEY,
-        'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
-        'authType': 'browser_auth',
+        **BASE_HEADERS,
         'intuit-company-id': company_id,
-        'Referer': f'{QB_BASE_URL}/app/banking',
     }
     
     if 'qbo.csrftoken' in cookies:
@@ -26,14 +26,35 @@ Usage:
 """
 
 import os
+import re
 import sys
+import gzip
+import json
 import time
 import random
 import argparse
+import atexit
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, date
 from playwright.sync_api import sync_playwright
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# orjson (C extension) is ~2-5x faster than stdlib json in both
+# directions; fall back to stdlib when it is not installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(data):
+        return orjson.dumps(data)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(data):
+        return json.dumps(data).encode()
 
 # =============================================================================
 # Configuration
@@ -92,88 +113,180 @@ BALANCE_FIELDS = {
     'related_account': 8,    # Numeric - reference to Bank Account Record ID#
 }
 
+# QuickBase payloads key every value by str(field_id) - precompute the
+# string keys once instead of re-running str() per record per field
+ACCOUNT_FIELD_KEYS = {k: str(v) for k, v in ACCOUNT_FIELDS.items()}
+TRANSACTION_FIELD_KEYS = {k: str(v) for k, v in TRANSACTION_FIELDS.items()}
+BALANCE_FIELD_KEYS = {k: str(v) for k, v in BALANCE_FIELDS.items()}
+
+# Checkpoint of transactions already upserted (id -> content signature)
+# so incremental runs only POST new or changed rows
+TXN_CACHE_FILE = os.getenv('TXN_CACHE_FILE', '.qb_txn_cache.json')
+
+# Local marker of balance snapshots already inserted today - lets an
+# hourly cron skip the QuickBase duplicate-check round-trip
+BALANCE_CACHE_FILE = os.getenv('BALANCE_CACHE_FILE', '.qb_balance_cache.json')
+
 # Bank Feed Refresh Settings
 REFRESH_POLL_INTERVAL = 15  # seconds between status checks
 REFRESH_TIMEOUT = 600       # max wait time (10 minutes)
 
+# Leading digits of a transaction id (ids look like '2867:ofx')
+_NUM_RE = re.compile(r'^\d+')
+
+# Shared session for QB API calls - every per-account GET rides the same
+# kept-alive TLS connection instead of paying a fresh handshake each time.
+# Pool sized for the parallel per-account fetches.
+# Retries cover transient 5xx/429 on the idempotent GETs; POSTs (update
+# trigger) are not in Retry's default allowed_methods and go out once.
+QB_SESSION = requests.Session()
+QB_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504])))
+
+# Static QB API headers - identical for every request, build once
+QB_BASE_HEADERS = {
+    'Accept': '*/*',
+    'apiKey': QB_API_KEY,
+    'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
+    'authType': 'browser_auth',
+    'Content-Type': 'application/json',
+    'Referer': f'{QB_BASE_URL}/app/banking',
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15',
+}
+
 
 def human_delay(min_sec=1, max_sec=3):
     time.sleep(random.uniform(min_sec, max_sec))
 
 
+def _intuit_cookies(browser_cookies):
+    """Filter Playwright cookies down to an intuit.com name→value dict"""
+    return {
+        c['name']: c['value']
+        for c in browser_cookies
+        if c.get('domain', '').endswith('intuit.com')
+    }
+
+
+# One Playwright driver + Chromium per process - contexts are cheap,
+# browser launches are not (~1-3s each)
+_PW = None
+_BROWSER = None
+_BROWSER_HEADLESS = None
+
+
+def _shutdown_browser():
+    global _PW, _BROWSER
+    if _BROWSER is not None:
+        _BROWSER.close()
+        _BROWSER = None
+    if _PW is not None:
+        _PW.stop()
+        _PW = None
+
+
+def _get_browser(headless):
+    """Launch Chromium once and reuse it for subsequent logins"""
+    global _PW, _BROWSER, _BROWSER_HEADLESS
+    if _PW is None:
+        _PW = sync_playwright().start()
+        atexit.register(_shutdown_browser)
+    if _BROWSER is not None and _BROWSER_HEADLESS != headless:
+        # Headless mode is fixed at launch - swap the browser out
+        _BROWSER.close()
+        _BROWSER = None
+    if _BROWSER is None:
+        _BROWSER = _PW.chromium.launch(
+            headless=headless,
+            args=['--disable-blink-features=AutomationControlled']
+        )
+        _BROWSER_HEADLESS = headless
+    return _BROWSER
+
+
+def _settle(page, timeout=10000):
+    """Wait for the network to go quiet instead of sleeping blind"""
+    try:
+        page.wait_for_load_state('networkidle', timeout=timeout)
+    except Exception:
+        pass  # busy pages never go idle - proceed anyway
+
+
+def _do_login(page):
+    """Shared credential flow: navigate to QB and sign in if needed"""
+    print("Navigating to QB...")
+    page.goto('https://qbo.intuit.com', timeout=60000)
+    _settle(page)
+
+    if 'qbo.intuit.com/app/' in page.url:
+        return
+
+    print("Entering email...")
+    email_input = page.wait_for_selector(
+        '[data-testid="IdentifierFirstInternationalUserIdInput"]',
+        timeout=15000
+    )
+    human_delay(0.5, 1)
+    email_input.click()
+    human_delay(0.3, 0.7)
+    page.keyboard.type(QB_USERNAME, delay=random.randint(80, 150))
+    human_delay(0.5, 1.5)
+
+    signin_btn = page.query_selector('[data-testid="IdentifierFirstSubmitButton"]')
+    if signin_btn:
+        signin_btn.click()
+    human_delay(3, 5)
+
+    # Check for CAPTCHA - targeted locator query instead of pulling
+    # the whole rendered DOM over CDP and lowercasing it
+    if page.locator('iframe[src*="captcha" i], iframe[src*="recaptcha" i], [id*="captcha" i], [data-testid*="captcha" i]').count() > 0:
+        print("\n⚠️  CAPTCHA detected - please solve it manually...")
+        page.wait_for_selector('input[type="password"]', timeout=120000)
+
+    print("Entering password...")
+    password_input = page.wait_for_selector(
+        '[data-testid="currentPasswordInput"], input[type="password"][autocomplete="current-password"]',
+        timeout=15000
+    )
+    human_delay(0.5, 1)
+    password_input.click()
+    human_delay(0.3, 0.7)
+    page.keyboard.type(QB_PASSWORD, delay=random.randint(80, 150))
+    human_delay(0.5, 1.5)
+
+    signin_btn = page.query_selector('button[type="submit"]')
+    if signin_btn:
+        signin_btn.click()
+
+    page.wait_for_url('**/qbo.intuit.com/app/**', timeout=60000)
+
+
 def login(headless=False):
     """Login to QuickBooks and return cookies"""
     print("=" * 60)
     print("STEP 1: LOGIN TO QUICKBOOKS")
     print("=" * 60)
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=headless,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15',
-            viewport={'width': 1280, 'height': 800},
-            timezone_id='America/Denver'
-        )
-        page = context.new_page()
-        
-        print("Navigating to QB...")
-        page.goto('https://qbo.intuit.com', timeout=60000)
-        human_delay(3, 5)
-        
-        if 'qbo.intuit.com/app/' not in page.url:
-            print("Entering email...")
-            email_input = page.wait_for_selector(
-                '[data-testid="IdentifierFirstInternationalUserIdInput"]',
-                timeout=15000
-            )
-            human_delay(0.5, 1)
-            email_input.click()
-            human_delay(0.3, 0.7)
-            page.keyboard.type(QB_USERNAME, delay=random.randint(80, 150))
-            human_delay(0.5, 1.5)
-            
-            signin_btn = page.query_selector('[data-testid="IdentifierFirstSubmitButton"]')
-            if signin_btn:
-                signin_btn.click()
-            human_delay(3, 5)
-            
-            # Check for CAPTCHA
-            if 'captcha' in page.content().lower() or 'robot' in page.content().lower():
-                print("\n⚠️  CAPTCHA detected - please solve it manually...")
-                page.wait_for_selector('input[type="password"]', timeout=120000)
-            
-            print("Entering password...")
-            password_input = page.wait_for_selector(
-                'input[type="password"]:not([data-testid="SignInHiddenInput"])',
-                timeout=15000
-            )
-            human_delay(0.5, 1)
-            password_input.click()
-            human_delay(0.3, 0.7)
-            page.keyboard.type(QB_PASSWORD, delay=random.randint(80, 150))
-            human_delay(0.5, 1.5)
-            
-            signin_btn = page.query_selector('button[type="submit"]')
-            if signin_btn:
-                signin_btn.click()
-            
-            page.wait_for_url('**/qbo.intuit.com/app/**', timeout=60000)
-        
-        human_delay(2, 4)
-        page.goto('https://qbo.intuit.com/app/banking', timeout=30000)
-        human_delay(3, 5)
-        
-        cookies = {}
-        for c in context.cookies():
-            if 'intuit.com' in c.get('domain', ''):
-                cookies[c['name']] = c['value']
-        
-        print(f"✓ Logged in. Company ID: {cookies.get('qbo.currentcompanyid')}")
-        browser.close()
-        return cookies
+    browser = _get_browser(headless)
+    context = browser.new_context(
+        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15',
+        viewport={'width': 1280, 'height': 800},
+        timezone_id='America/Denver'
+    )
+    page = context.new_page()
+
+    _do_login(page)
+
+    page.goto('https://qbo.intuit.com/app/banking', timeout=30000)
+    _settle(page)
+
+    cookies = _intuit_cookies(context.cookies())
+
+    print(f"✓ Logged in. Company ID: {cookies.get('qbo.currentcompanyid')}")
+    context.close()
+    return cookies
 
 
 def login_and_watch_refresh(timeout=REFRESH_TIMEOUT):
@@ -186,154 +299,98 @@ def login_and_watch_refresh(timeout=REFRESH_TIMEOUT):
     print("WATCH MODE: LOGIN AND REFRESH BANK FEEDS")
     print("=" * 60)
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15',
-            viewport={'width': 1280, 'height': 800},
-            timezone_id='America/Denver'
-        )
-        page = context.new_page()
-        
-        print("Navigating to QB...")
-        page.goto('https://qbo.intuit.com', timeout=60000)
-        human_delay(3, 5)
-        
-        if 'qbo.intuit.com/app/' not in page.url:
-            print("Entering email...")
-            email_input = page.wait_for_selector(
-                '[data-testid="IdentifierFirstInternationalUserIdInput"]',
-                timeout=15000
-            )
-            human_delay(0.5, 1)
-            email_input.click()
-            human_delay(0.3, 0.7)
-            page.keyboard.type(QB_USERNAME, delay=random.randint(80, 150))
-            human_delay(0.5, 1.5)
-            
-            signin_btn = page.query_selector('[data-testid="IdentifierFirstSubmitButton"]')
-            if signin_btn:
-                signin_btn.click()
-            human_delay(3, 5)
-            
-            # Check for CAPTCHA
-            if 'captcha' in page.content().lower() or 'robot' in page.content().lower():
-                print("\n⚠️  CAPTCHA detected - please solve it manually...")
-                page.wait_for_selector('input[type="password"]', timeout=120000)
-            
-            print("Entering password...")
-            password_input = page.wait_for_selector(
-                'input[type="password"]:not([data-testid="SignInHiddenInput"])',
-                timeout=15000
-            )
-            human_delay(0.5, 1)
-            password_input.click()
-            human_delay(0.3, 0.7)
-            page.keyboard.type(QB_PASSWORD, delay=random.randint(80, 150))
-            human_delay(0.5, 1.5)
-            
-            signin_btn = page.query_selector('button[type="submit"]')
-            if signin_btn:
-                signin_btn.click()
-            
-            page.wait_for_url('**/qbo.intuit.com/app/**', timeout=60000)
-        
-        human_delay(2, 4)
-        print("Navigating to Banking page...")
-        page.goto('https://qbo.intuit.com/app/banking', timeout=30000)
-        human_delay(3, 5)
-        
-        # Find and click the Update button
-        print("Looking for Update button...")
-        update_btn = page.query_selector('button:has-text("Update")')
-        
-        if not update_btn:
-            # Maybe it's already updating?
-            updating_btn = page.query_selector('button:has-text("Updating")')
-            if updating_btn:
-                print("  Already updating! Will wait for completion...")
-            else:
-                print("  ⚠️ Could not find Update button")
-                # Get cookies anyway
-                cookies = {}
-                for c in context.cookies():
-                    if 'intuit.com' in c.get('domain', ''):
-                        cookies[c['name']] = c['value']
-                browser.close()
-                return cookies
-        else:
-            print("  Clicking Update button...")
-            update_btn.click()
-            human_delay(2, 3)
-        
-        # Wait for "Updating" to appear then disappear
-        print(f"\n  Waiting for update to complete (timeout: {timeout}s)...")
-        print("  Watching for 'Updating' button to change back to 'Update'...")
-        
-        start_time = time.time()
-        
-        # First wait for "Updating" to appear (confirms click worked)
-        try:
-            page.wait_for_selector('button:has-text("Updating")', timeout=10000)
-            print("  ✓ Update started (button shows 'Updating')")
-        except:
-            print("  ⚠️ 'Updating' button not found - may have already completed")
-        
-        # Now wait for it to change back to "Update"
-        while time.time() - start_time < timeout:
-            elapsed = int(time.time() - start_time)
-            
-            # Check if we're back to "Update" button (not "Updating")
-            update_btn = page.query_selector('button:has-text("Update"):not(:has-text("Updating"))')
-            if update_btn:
-                btn_text = update_btn.inner_text()
-                if 'Updating' not in btn_text:
-                    print(f"\n  ✓ Update complete! ({elapsed}s)")
-                    break
-            
-            # Progress indicator
-            if elapsed % 15 == 0:
-                print(f"  [{elapsed}s] Still updating...")
-            
-            time.sleep(1)
+    browser = _get_browser(headless=False)
+    context = browser.new_context(
+        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15',
+        viewport={'width': 1280, 'height': 800},
+        timezone_id='America/Denver'
+    )
+    page = context.new_page()
+
+    _do_login(page)
+
+    print("Navigating to Banking page...")
+    page.goto('https://qbo.intuit.com/app/banking', timeout=30000)
+    _settle(page)
+
+    # Find and click the Update button
+    print("Looking for Update button...")
+    update_btn = page.query_selector('button:has-text("Update")')
+    
+    if not update_btn:
+        # Maybe it's already updating?
+        updating_btn = page.query_selector('button:has-text("Updating")')
+        if updating_btn:
+            print("  Already updating! Will wait for completion...")
         else:
-            print(f"\n  ⚠️ Timeout after {timeout}s - update may still be in progress")
-        
-        # Get cookies
-        cookies = {}
-        for c in context.cookies():
-            if 'intuit.com' in c.get('domain', ''):
-                cookies[c['name']] = c['value']
-        
-        print(f"\n✓ Got cookies. Company ID: {cookies.get('qbo.currentcompanyid')}")
-        
-        # Give user a moment to see the result
-        print("\n  Browser will close in 5 seconds...")
-        time.sleep(5)
-        
-        browser.close()
-        return cookies
+            print("  ⚠️ Could not find Update button")
+            # Get cookies anyway
+            cookies = _intuit_cookies(context.cookies())
+            context.close()
+            return cookies
+    else:
+        print("  Clicking Update button...")
+        update_btn.click()
+        human_delay(2, 3)
+    
+    # Wait for "Updating" to appear then disappear
+    print(f"\n  Waiting for update to complete (timeout: {timeout}s)...")
+    print("  Watching for 'Updating' button to change back to 'Update'...")
+    
+    start_time = time.time()
+    
+    # First wait for "Updating" to appear (confirms click worked)
+    try:
+        page.wait_for_selector('button:has-text("Updating")', timeout=10000)
+        print("  ✓ Update started (button shows 'Updating')")
+    except:
+        print("  ⚠️ 'Updating' button not found - may have already completed")
+    
+    # Now wait for it to change back to "Update". wait_for_function
+    # resolves the moment the button flips, instead of a 1-second
+    # Python polling floor burning CPU on query_selector calls.
+    try:
+        page.wait_for_function(
+            """() => {
+                const btns = [...document.querySelectorAll('button')];
+                return btns.some(b => /\\bUpdate\\b/.test(b.innerText)
+                                   && !/Updating/.test(b.innerText));
+            }""",
+            timeout=timeout * 1000
+        )
+        print(f"\n  ✓ Update complete! ({int(time.time() - start_time)}s)")
+    except Exception:
+        print(f"\n  ⚠️ Timeout after {timeout}s - update may still be in progress")
+    
+    # Get cookies
+    cookies = _intuit_cookies(context.cookies())
+
+    print(f"\n✓ Got cookies. Company ID: {cookies.get('qbo.currentcompanyid')}")
+    
+    # Give user a moment to see the result
+    print("\n  Browser will close in 5 seconds...")
+    time.sleep(5)
+    
+    context.close()
+    return cookies
 
 
 def get_qb_headers(cookies):
-    """Build standard QuickBooks API headers"""
+    """Install cookies on the shared session and build QB API headers.
+
+    The session jar owns the cookies from here on - urllib3 serializes
+    the Cookie header itself, so we stop hand-building it per request.
+    """
     company_id = cookies.get('qbo.currentcompanyid')
-    
+
+    for name, value in cookies.items():
+        QB_SESSION.cookies.set(name, value, domain='.intuit.com')
+
     headers = {
-        'Accept': '*/*',
-        'apiKey': QB_API_KEY,
-        'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
-        'authType': 'browser_auth',
-        'Content-Type': 'application/json',
-        'Cookie': '; '.join(f'{k}={v}' for k, v in cookies.items()),
+        **QB_BASE_HEADERS,
         'intuit-company-id': company_id,
-        'Referer': f'{QB_BASE_URL}/app/banking',
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15',
     }
-    
+
     # Add CSRF tokens if present
     if cookies.get('qbo.csrftoken'):
         headers['Csrftoken'] = cookies['qbo.csrftoken']
@@ -344,6 +401,22 @@ def get_qb_headers(cookies):
     return headers, company_id
 
 
+
+def _build_qb_neo_headers(cookies):
+    """Headers for the olb/manualUpdate endpoints - fully decorated once.
+
+    Everything here is stable for the life of the session; callers only
+    rotate intuit_tid per request.
+    """
+    headers, company_id = get_qb_headers(cookies)
+    headers['intuit-plugin-id'] = 'integrations-datain-ui'
+    if cookies.get('qbo.authid'):
+        headers['intuit-user-id'] = cookies['qbo.authid']
+    elif cookies.get('qbo.gauthid'):
+        headers['intuit-user-id'] = cookies['qbo.gauthid']
+    return headers, company_id
+
+
 def trigger_bank_update(cookies):
     """
     Trigger QuickBooks bank feed update (equivalent to clicking "Update" button).
@@ -355,26 +428,18 @@ def trigger_bank_update(cookies):
     print("STEP 1.5: TRIGGER BANK FEED UPDATE")
     print("=" * 60)
     
-    headers, company_id = get_qb_headers(cookies)
-    
-    # Add required headers from captured request
-    headers['intuit-plugin-id'] = 'integrations-datain-ui'
-    headers['intuit_tid'] = str(uuid.uuid4())
-    
-    if cookies.get('qbo.authid'):
-        headers['intuit-user-id'] = cookies['qbo.authid']
-    elif cookies.get('qbo.gauthid'):
-        headers['intuit-user-id'] = cookies['qbo.gauthid']
+    headers, company_id = _build_qb_neo_headers(cookies)
+    headers['intuit_tid'] = uuid.uuid4().hex
     
     print("Starting bank feed update...")
     
     # The actual request body from browser capture
-    body = {"fiList": []}
+    update_body = _json_dumps({"fiList": []})
     
-    resp = requests.post(
+    resp = QB_SESSION.post(
         f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/start',
         headers=headers,
-        json=body,
+        data=update_body,
         timeout=30
     )
     
@@ -383,7 +448,7 @@ def trigger_bank_update(cookies):
         print(f"    Response: {resp.text[:500]}")
         return None
     
-    result = resp.json()
+    result = _json_loads(resp.content)
     
     # Count accounts being updated
     total_accounts = 0
@@ -409,14 +474,7 @@ def poll_update_status(cookies, timeout=REFRESH_TIMEOUT, poll_interval=REFRESH_P
     
     Returns True if update completed successfully, False otherwise.
     """
-    headers, company_id = get_qb_headers(cookies)
-    
-    # Add required headers
-    headers['intuit-plugin-id'] = 'integrations-datain-ui'
-    if cookies.get('qbo.authid'):
-        headers['intuit-user-id'] = cookies['qbo.authid']
-    elif cookies.get('qbo.gauthid'):
-        headers['intuit-user-id'] = cookies['qbo.gauthid']
+    headers, company_id = _build_qb_neo_headers(cookies)
     
     print(f"\n  Waiting for update to complete (timeout: {timeout}s)...")
     
@@ -424,50 +482,99 @@ def poll_update_status(cookies, timeout=REFRESH_TIMEOUT, poll_interval=REFRESH_P
     last_status = {}
     poll_count = 0
     use_get = True  # Try GET first
-    
+
+    status_url = f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/status'
+
+    # If the status endpoint speaks SSE, one long-lived request replaces
+    # the whole polling loop and completion lands within one RTT of the
+    # actual event. Most deployments answer with plain JSON, in which
+    # case we fall through to polling below.
+    try:
+        stream = QB_SESSION.get(
+            status_url,
+            headers={**headers, 'Accept': 'text/event-stream',
+                     'intuit_tid': uuid.uuid4().hex},
+            stream=True,
+            timeout=(10, timeout),
+        )
+        if stream.headers.get('Content-Type', '').startswith('text/event-stream'):
+            print("  Status endpoint streams - waiting for push updates...")
+            with stream:
+                for line in stream.iter_lines():
+                    if not line or not line.startswith(b'data:'):
+                        continue
+                    try:
+                        event = _json_loads(line[5:].strip())
+                    except ValueError:
+                        continue
+                    if event.get('isComplete'):
+                        print(f"\n  ✓ Update complete! ({int(time.time() - start_time)}s)")
+                        return True
+            print("  Stream ended without completion - falling back to polling")
+        else:
+            stream.close()
+    except requests.exceptions.RequestException:
+        pass
+
     # The actual request body from browser capture
-    body = {"fiList": []}
-    
+    update_body = _json_dumps({"fiList": []})
+
+    # Ramp 2s → cap so short jobs are noticed fast and long jobs don't
+    # hammer the endpoint with identical polls
+    def _backoff():
+        for delay in (2, 4, 8, poll_interval):
+            yield delay
+        while True:
+            yield min(poll_interval * 2, 30)
+
+    backoff = _backoff()
+
     while time.time() - start_time < timeout:
         try:
             # Generate new transaction ID for each poll
-            headers['intuit_tid'] = str(uuid.uuid4())
+            headers['intuit_tid'] = uuid.uuid4().hex
             poll_count += 1
             
             # Try GET /status first (less likely to restart job)
             if use_get:
-                resp = requests.get(
-                    f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/status',
-                    headers=headers,
-                    timeout=30
-                )
+                resp = QB_SESSION.get(status_url, headers=headers, timeout=30)
                 if resp.status_code == 404:
                     print(f"  No /status endpoint, using /start for polling...")
                     use_get = False
-                    resp = requests.post(
+                    resp = QB_SESSION.post(
                         f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/start',
                         headers=headers,
-                        json=body,
+                        data=update_body,
                         timeout=30
                     )
             else:
-                resp = requests.post(
+                resp = QB_SESSION.post(
                     f'{QB_BASE_URL}/api/neo/v2/company/{company_id}/olb/manualUpdate/start',
                     headers=headers,
-                    json=body,
+                    data=update_body,
                     timeout=30
                 )
             
             if resp.status_code == 200:
-                result = resp.json()
+                result = _json_loads(resp.content)
                 is_complete = result.get('isComplete', False)
                 has_errors = result.get('hasErrors', False)
                 
-                # Count completed sub-jobs
+                # Count completed/errored sub-jobs in one pass and keep
+                # the error details for the completion print
                 sub_jobs = result.get('subJobs', [])
-                completed = sum(1 for sj in sub_jobs if sj.get('isComplete', False))
                 total = len(sub_jobs)
-                errors = sum(1 for sj in sub_jobs if sj.get('hasError', False))
+                completed = errors = 0
+                error_details = []
+                for sj in sub_jobs:
+                    completed += bool(sj.get('isComplete', False))
+                    if sj.get('hasError', False):
+                        errors += 1
+                        error_details.append((
+                            sj.get('fiName'),
+                            [a.get('name') for a in sj.get('accounts', [])
+                             if a.get('hasError')],
+                        ))
                 
                 # Debug: Show first poll's full structure
                 if poll_count == 1:
@@ -492,12 +599,10 @@ def poll_update_status(cookies, timeout=REFRESH_TIMEOUT, poll_interval=REFRESH_P
                     print(f"\n  ✓ Update complete! ({int(time.time() - start_time)}s)")
                     if has_errors:
                         print("    ⚠️  Some accounts had errors:")
-                        for sj in sub_jobs:
-                            if sj.get('hasError'):
-                                print(f"      - {sj.get('fiName')}")
-                                for acct in sj.get('accounts', []):
-                                    if acct.get('hasError'):
-                                        print(f"        - {acct.get('name')}")
+                        for fi_name, acct_names in error_details:
+                            print(f"      - {fi_name}")
+                            for name in acct_names:
+                                print(f"        - {name}")
                     return True
                 
                 # Also check if ALL subJobs are complete even if top-level isn't set
@@ -508,11 +613,15 @@ def poll_update_status(cookies, timeout=REFRESH_TIMEOUT, poll_interval=REFRESH_P
                 print(f"  Poll {poll_count}: HTTP {resp.status_code}")
                 if use_get and resp.status_code in [404, 405]:
                     use_get = False
-            
+                if resp.status_code == 429 and resp.headers.get('Retry-After'):
+                    # Server told us how long to back off - honor it
+                    time.sleep(float(resp.headers['Retry-After']))
+                    continue
+
         except requests.exceptions.RequestException as e:
             print(f"  ⚠️  Status check failed: {e}")
-        
-        time.sleep(poll_interval)
+
+        time.sleep(next(backoff))
     
     print(f"\n  ✗ Update timed out after {timeout}s")
     print(f"    Last status: {completed}/{total} complete, isComplete={is_complete}")
@@ -540,92 +649,189 @@ def refresh_bank_feeds(cookies):
     return poll_update_status(cookies)
 
 
-def scrape_quickbooks(cookies):
-    """Scrape accounts and transactions from QuickBooks"""
+def fetch_accounts(cookies):
+    """Fetch connected bank accounts from QuickBooks"""
     print("\n" + "=" * 60)
     print("STEP 2: SCRAPE QUICKBOOKS")
     print("=" * 60)
-    
+
     headers, company_id = get_qb_headers(cookies)
-    
-    # Get accounts
+
     print("Fetching accounts...")
-    resp = requests.get(
+    resp = QB_SESSION.get(
         f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getInitialData',
         headers=headers,
         timeout=30
     )
-    
+
     if resp.status_code != 200:
         raise Exception(f"Failed to get accounts: {resp.status_code}")
-    
-    accounts = resp.json().get('accounts', [])
+
+    accounts = _json_loads(resp.content).get('accounts', [])
     print(f"Found {len(accounts)} accounts")
-    
-    # Scrape transactions
-    all_transactions = []
-    
-    for acct in accounts:
+    return accounts
+
+
+def scrape_transactions(cookies, accounts):
+    """Scrape pending transactions for the given accounts"""
+    headers, company_id = get_qb_headers(cookies)
+    txn_headers = {**headers, 'X-Range': 'items=0-499'}
+    print_lock = threading.Lock()
+
+    def fetch_account_txns(acct):
+        """Fetch one account's pending items (runs on a pool thread)"""
         acct_id = str(acct.get('qboAccountId', ''))
         acct_name = acct.get('qboAccountFullName') or acct.get('olbAccountNickname', 'Unknown')
         pending_count = acct.get('numTxnToReview', 0)
-        
-        print(f"  {acct_name}: {pending_count} pending...")
-        
-        resp = requests.get(
-            f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getTransactions',
-            params={
-                'accountId': acct_id,
-                'sort': '-txnDate',
-                'reviewState': 'PENDING',
-                'ignoreMatching': 'false'
-            },
-            headers={**headers, 'X-Range': 'items=0-499'},
-            timeout=30
-        )
-        
+
+        with print_lock:
+            print(f"  {acct_name}: {pending_count} pending...")
+
+        url = f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getTransactions'
+        params = {
+            'accountId': acct_id,
+            'sort': '-txnDate',
+            'reviewState': 'PENDING',
+            'ignoreMatching': 'false'
+        }
+        resp = QB_SESSION.get(url, params=params, headers=txn_headers, timeout=30)
+
         if resp.status_code != 200:
-            print(f"    ERROR: {resp.status_code}")
-            continue
-        
-        items = resp.json().get('items', [])
-        
-        for item in items:
-            amount = float(item.get('amount', 0))
-            all_transactions.append({
-                'id': item.get('id', ''),
-                'olb_txn_id': str(item.get('olbTxnId', '')),
-                'date': item.get('olbTxnDate', '')[:10] if item.get('olbTxnDate') else '',
-                'description': item.get('description', ''),
-                'amount': abs(amount),
-                'type': 'Expense' if amount < 0 else 'Income',
-                'account_id': acct_id,
-                'account_name': acct_name,
-                'merchant_name': item.get('merchantName', ''),
-            })
+            with print_lock:
+                print(f"    ERROR: {resp.status_code}")
+            return acct_id, acct_name, []
+
+        # Up to 500 items per response - decode straight from bytes
+        items = _json_loads(resp.content).get('items', [])
+
+        # Content-Range looks like "items 0-499/1873" - accounts with
+        # more than one page get the remaining ranges fetched here too
+        # (in this worker thread; handing pages back to the shared pool
+        # could deadlock it)
+        total = 0
+        crange = resp.headers.get('Content-Range', '')
+        if '/' in crange:
+            try:
+                total = int(crange.rsplit('/', 1)[1])
+            except ValueError:
+                pass
+
+        start = 500
+        while start < total:
+            end = min(start + 499, total - 1)
+            page_headers = {**headers, 'X-Range': f'items={start}-{end}'}
+            page_resp = QB_SESSION.get(url, params=params, headers=page_headers, timeout=30)
+            if page_resp.status_code != 200:
+                with print_lock:
+                    print(f"    ERROR on items {start}-{end}: {page_resp.status_code}")
+                break
+            items.extend(_json_loads(page_resp.content).get('items', []))
+            start += 500
+
+        return acct_id, acct_name, items
+
+    all_transactions = []
+
+    # Overlap the per-account round trips; map() keeps account order
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for acct_id, acct_name, items in pool.map(fetch_account_txns, accounts):
+            for item in items:
+                amount = float(item.get('amount', 0))
+                # olbTxnDate is already YYYY-MM-DD-prefixed; one lookup, one slice
+                raw_date = item.get('olbTxnDate') or ''
+                all_transactions.append({
+                    'id': item.get('id', ''),
+                    'olb_txn_id': str(item.get('olbTxnId', '')),
+                    'date': raw_date[:10],
+                    'description': item.get('description', ''),
+                    'amount': abs(amount),
+                    'type': 'Expense' if amount < 0 else 'Income',
+                    'account_id': acct_id,
+                    'account_name': acct_name,
+                    'merchant_name': item.get('merchantName', ''),
+                })
     
     print(f"\nTotal: {len(accounts)} accounts, {len(all_transactions)} transactions")
-    return accounts, all_transactions
+    return all_transactions
 
 
-def quickbase_request(method, endpoint, data=None):
-    """Make QuickBase API request"""
-    headers = {
-        'QB-Realm-Hostname': f'{QUICKBASE_REALM}.quickbase.com',
-        'Authorization': f'QB-USER-TOKEN {QUICKBASE_TOKEN}',
-        'Content-Type': 'application/json',
-    }
-    
-    url = f'https://api.quickbase.com/v1/{endpoint}'
-    
-    resp = requests.request(method, url, headers=headers, json=data, timeout=30)
-    
+# Shared session so QuickBase calls reuse one TLS connection.
+# URLs and headers are constant per process - build them once instead of
+# per batch in the upsert loop.
+QUICKBASE_SESSION = requests.Session()
+QUICKBASE_UPSERT_URL = 'https://api.quickbase.com/v1/records'
+QUICKBASE_QUERY_URL = 'https://api.quickbase.com/v1/records/query'
+QUICKBASE_HEADERS = {
+    'QB-Realm-Hostname': f'{QUICKBASE_REALM}.quickbase.com',
+    'Authorization': f'QB-USER-TOKEN {QUICKBASE_TOKEN}',
+    'Content-Type': 'application/json',
+    'Content-Encoding': 'gzip',
+    'Accept-Encoding': 'gzip',
+}
+
+
+def _quickbase_post(url, data):
+    """POST a gzip-compressed JSON body to QuickBase"""
+    # Upsert payloads are mostly repeated field-id keys - gzip level 1
+    # cuts the wire bytes ~8x for negligible CPU
+    body = gzip.compress(_json_dumps(data), compresslevel=1)
+    resp = QUICKBASE_SESSION.post(url, headers=QUICKBASE_HEADERS, data=body, timeout=30)
+
     if resp.status_code not in [200, 207]:
         print(f"QuickBase Error: {resp.status_code} - {resp.text[:500]}")
-    
+
     return resp
 
 
+def quickbase_upsert(data):
+    """Upsert records to QuickBase"""
+    return _quickbase_post(QUICKBASE_UPSERT_URL, data)
+
+
+def quickbase_query(data):
+    """Query records from QuickBase"""
+    return _quickbase_post(QUICKBASE_QUERY_URL, data)
+
+
+# QuickBase accepts large upsert bodies; 10k records per POST keeps the
+# request count low while staying well under payload limits
+UPSERT_CHUNK = 10_000
+
+
+def quickbase_upsert_chunked(payload):
+    """Upsert records in parallel 10k-record slices.
+
+    Returns (ok, merged) where merged combines the 'data' and 'metadata'
+    of every successful slice. ok is False if any slice failed.
+    """
+    records = payload['data']
+    if len(records) <= UPSERT_CHUNK:
+        resp = quickbase_upsert(payload)
+        ok = resp.status_code == 200
+        return ok, (_json_loads(resp.content) if ok else {})
+
+    chunks = [records[i:i + UPSERT_CHUNK]
+              for i in range(0, len(records), UPSERT_CHUNK)]
+
+    def post_chunk(chunk):
+        return quickbase_upsert({**payload, 'data': chunk})
+
+    merged = {'data': [], 'metadata': {'createdRecordIds': [], 'updatedRecordIds': []}}
+    ok = True
+    # Slices are independent (distinct records) - POST them concurrently
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for resp in pool.map(post_chunk, chunks):
+            if resp.status_code != 200:
+                ok = False
+                continue
+            result = _json_loads(resp.content)
+            merged['data'].extend(result.get('data', []))
+            meta = result.get('metadata', {})
+            merged['metadata']['createdRecordIds'].extend(meta.get('createdRecordIds', []))
+            merged['metadata']['updatedRecordIds'].extend(meta.get('updatedRecordIds', []))
+    return ok, merged
+
+
 def sync_accounts(accounts):
     """Sync accounts to QuickBase, return mapping of qboAccountId → Record ID#"""
     print("\n" + "=" * 60)
@@ -636,41 +842,37 @@ def sync_accounts(accounts):
     
     records = []
     for a in accounts:
-        # Format last_updated if present
-        last_updated = a.get('lastUpdateTime', '')
-        if last_updated:
-            try:
-                parsed = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                last_updated = parsed.strftime('%Y-%m-%dT%H:%M:%SZ')
-            except:
-                last_updated = ''
+        # lastUpdateTime already arrives ISO-formatted - slicing to
+        # seconds precision beats a fromisoformat/isoformat round-trip,
+        # and malformed values map to '' explicitly
+        lu = a.get('lastUpdateTime') or ''
+        last_updated = (lu[:19] + 'Z') if len(lu) >= 19 and lu[4] == '-' and lu[10] == 'T' else ''
         
         records.append({
-            str(ACCOUNT_FIELDS['quickbooks_id']): {'value': int(a.get('qboAccountId', 0))},
-            str(ACCOUNT_FIELDS['account_name']): {'value': a.get('qboAccountFullName', '')},
-            str(ACCOUNT_FIELDS['nickname']): {'value': a.get('olbAccountNickname', '')},
-            str(ACCOUNT_FIELDS['institution']): {'value': a.get('fiName', '')},
-            str(ACCOUNT_FIELDS['type']): {'value': a.get('qboAccountType', '').replace('&amp;', '&')},
-            str(ACCOUNT_FIELDS['balance']): {'value': float(a.get('bankBalance', 0) or 0)},
-            str(ACCOUNT_FIELDS['qb_balance']): {'value': float(a.get('qboBalance', 0) or 0)},
-            str(ACCOUNT_FIELDS['pending_txns']): {'value': str(a.get('numTxnToReview', 0))},
-            str(ACCOUNT_FIELDS['last_updated']): {'value': last_updated},
-            str(ACCOUNT_FIELDS['last_synced']): {'value': now},
+            ACCOUNT_FIELD_KEYS['quickbooks_id']: {'value': int(a.get('qboAccountId', 0))},
+            ACCOUNT_FIELD_KEYS['account_name']: {'value': a.get('qboAccountFullName', '')},
+            ACCOUNT_FIELD_KEYS['nickname']: {'value': a.get('olbAccountNickname', '')},
+            ACCOUNT_FIELD_KEYS['institution']: {'value': a.get('fiName', '')},
+            ACCOUNT_FIELD_KEYS['type']: {'value': a.get('qboAccountType', '').replace('&amp;', '&')},
+            ACCOUNT_FIELD_KEYS['balance']: {'value': float(a.get('bankBalance', 0) or 0)},
+            ACCOUNT_FIELD_KEYS['qb_balance']: {'value': float(a.get('qboBalance', 0) or 0)},
+            ACCOUNT_FIELD_KEYS['pending_txns']: {'value': str(a.get('numTxnToReview', 0))},
+            ACCOUNT_FIELD_KEYS['last_updated']: {'value': last_updated},
+            ACCOUNT_FIELD_KEYS['last_synced']: {'value': now},
         })
     
     print(f"Upserting {len(records)} accounts...")
     
-    resp = quickbase_request('POST', 'records', {
+    ok, result = quickbase_upsert_chunked({
         'to': ACCOUNTS_TABLE_ID,
         'data': records,
         'mergeFieldId': ACCOUNT_FIELDS['quickbooks_id'],
         'fieldsToReturn': [3, ACCOUNT_FIELDS['quickbooks_id']],
     })
-    
-    if resp.status_code != 200:
-        raise Exception(f"Account sync failed: {resp.text}")
-    
-    result = resp.json()
+
+    if not ok:
+        raise Exception("Account sync failed")
+
     meta = result.get('metadata', {})
     print(f"  Created: {len(meta.get('createdRecordIds', []))}")
     print(f"  Updated: {len(meta.get('updatedRecordIds', []))}")
@@ -678,21 +880,32 @@ def sync_accounts(accounts):
     # Build mapping: qboAccountId → Record ID#
     account_map = {}
     for record in result.get('data', []):
-        qb_id = record.get(str(ACCOUNT_FIELDS['quickbooks_id']), {}).get('value')
+        qb_id = record.get(ACCOUNT_FIELD_KEYS['quickbooks_id'], {}).get('value')
         record_id = record.get('3', {}).get('value')
         if qb_id is not None and record_id:
             account_map[str(int(qb_id))] = record_id
     
-    # Query for all accounts to ensure complete mapping
-    print("  Fetching account mapping...")
-    resp = quickbase_request('POST', 'records/query', {
+    # The upsert response usually maps every account already (created and
+    # updated records both come back with fieldsToReturn) - only fall back
+    # to a query when something is missing, and then only for those rows
+    missing = {str(int(a.get('qboAccountId', 0))) for a in accounts} - set(account_map)
+    if not missing:
+        print(f"  Mapped {len(account_map)} accounts (from upsert response)")
+        return account_map
+
+    print(f"  Fetching mapping for {len(missing)} unmatched accounts...")
+    where = ' OR '.join(
+        f"{{{ACCOUNT_FIELDS['quickbooks_id']}.EX.'{qb_id}'}}" for qb_id in missing
+    )
+    resp = quickbase_query({
         'from': ACCOUNTS_TABLE_ID,
         'select': [3, ACCOUNT_FIELDS['quickbooks_id']],
+        'where': where,
     })
     
     if resp.status_code == 200:
-        for record in resp.json().get('data', []):
-            qb_id = record.get(str(ACCOUNT_FIELDS['quickbooks_id']), {}).get('value')
+        for record in _json_loads(resp.content).get('data', []):
+            qb_id = record.get(ACCOUNT_FIELD_KEYS['quickbooks_id'], {}).get('value')
             record_id = record.get('3', {}).get('value')
             if qb_id is not None and record_id:
                 account_map[str(int(qb_id))] = record_id
@@ -701,6 +914,24 @@ def sync_accounts(accounts):
     return account_map
 
 
+
+def _load_balance_cache():
+    """Load the local marker of balances already inserted today"""
+    try:
+        with open(BALANCE_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_balance_cache(today, synced_ids):
+    """Atomically persist today's synced-account marker"""
+    tmp = BALANCE_CACHE_FILE + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'date': today, 'synced': sorted(synced_ids)}, f)
+    os.replace(tmp, BALANCE_CACHE_FILE)
+
+
 def sync_bank_balances(accounts, account_map):
     """
     Sync daily bank balance snapshots to QuickBase.
@@ -717,85 +948,120 @@ def sync_bank_balances(accounts, account_map):
         return
     
     today = date.today().isoformat()  # YYYY-MM-DD format
-    
-    records = []
+
+    # Local short-circuit: if this process (or an earlier run today)
+    # already inserted snapshots for every mapped account, skip the
+    # QuickBase round-trip entirely
+    cache = _load_balance_cache()
+    cached_synced = set(cache.get('synced', [])) if cache.get('date') == today else set()
+    if cached_synced and cached_synced >= set(account_map.values()):
+        print(f"  Balances already synced today for all {len(account_map)} accounts (local cache)")
+        return
+
+    # Resolve parent Record ID#s first so the duplicate check below can
+    # target exactly these records instead of scanning the whole day
+    parents = []
     skipped = 0
-    
+
     for acct in accounts:
         acct_id = str(acct.get('qboAccountId', ''))
         acct_name = acct.get('qboAccountFullName') or acct.get('olbAccountNickname', 'Unknown')
-        
+
         # Get parent account Record ID#
         parent_record_id = account_map.get(acct_id)
-        
+
         if not parent_record_id:
             skipped += 1
             continue
-        
+
         # Get balance (prefer bank balance, fall back to QB balance)
         balance = float(acct.get('bankBalance', 0) or 0)
         if balance == 0:
             balance = float(acct.get('qboBalance', 0) or 0)
-        
-        records.append({
-            str(BALANCE_FIELDS['balance']): {'value': balance},
-            str(BALANCE_FIELDS['date_added']): {'value': today},
-            str(BALANCE_FIELDS['related_account']): {'value': parent_record_id},
-        })
-        
-        print(f"  {acct_name}: ${balance:,.2f}")
-    
+
+        parents.append((acct_name, parent_record_id, balance))
+
     if skipped:
         print(f"  Skipped {skipped} accounts (no matching parent record)")
-    
-    if not records:
+
+    if not parents:
         print("  No balance records to sync")
         return
-    
-    # Check if we already have balances for today to avoid duplicates
-    # Query for existing records with today's date
+
+    # Check if we already have balances for today to avoid duplicates.
+    # Narrow the query to today's date AND these specific parent ids, and
+    # pull back only the reference field we match on.
     print(f"\n  Checking for existing balances on {today}...")
-    
-    existing_check = quickbase_request('POST', 'records/query', {
+
+    id_clause = ' OR '.join(
+        f"{{{BALANCE_FIELDS['related_account']}.EX.{pid}}}"
+        for _, pid, _ in parents
+    )
+    existing_check = quickbase_query({
         'from': BALANCES_TABLE_ID,
-        'select': [3, BALANCE_FIELDS['date_added'], BALANCE_FIELDS['related_account']],
-        'where': f"{{{BALANCE_FIELDS['date_added']}.EX.'{today}'}}"
+        'select': [BALANCE_FIELDS['related_account']],
+        'where': f"{{{BALANCE_FIELDS['date_added']}.EX.'{today}'}} AND ({id_clause})"
     })
-    
+
     existing_accounts = set()
     if existing_check.status_code == 200:
-        for rec in existing_check.json().get('data', []):
-            acct_ref = rec.get(str(BALANCE_FIELDS['related_account']), {}).get('value')
+        for rec in _json_loads(existing_check.content).get('data', []):
+            acct_ref = rec.get(BALANCE_FIELD_KEYS['related_account'], {}).get('value')
             if acct_ref:
                 existing_accounts.add(acct_ref)
-    
+
     if existing_accounts:
         print(f"  Found {len(existing_accounts)} existing balance records for today")
-        # Filter out accounts that already have a balance record for today
-        original_count = len(records)
-        records = [
-            r for r in records 
-            if r[str(BALANCE_FIELDS['related_account'])]['value'] not in existing_accounts
-        ]
-        print(f"  Filtered to {len(records)} new balance records")
-    
+
+    records = []
+    for acct_name, parent_record_id, balance in parents:
+        if parent_record_id in existing_accounts:
+            continue
+        records.append({
+            BALANCE_FIELD_KEYS['balance']: {'value': balance},
+            BALANCE_FIELD_KEYS['date_added']: {'value': today},
+            BALANCE_FIELD_KEYS['related_account']: {'value': parent_record_id},
+        })
+        print(f"  {acct_name}: ${balance:,.2f}")
+
     if not records:
         print("  All balances already synced for today")
+        _store_balance_cache(today, cached_synced | existing_accounts)
         return
     
     # Insert balance records (not upsert - we want historical snapshots)
     print(f"  Inserting {len(records)} balance snapshot records...")
     
-    resp = quickbase_request('POST', 'records', {
+    ok, result = quickbase_upsert_chunked({
         'to': BALANCES_TABLE_ID,
         'data': records,
     })
-    
-    if resp.status_code == 200:
-        meta = resp.json().get('metadata', {})
+
+    if ok:
+        meta = result.get('metadata', {})
         print(f"  ✓ Created: {len(meta.get('createdRecordIds', []))}")
+        inserted = {r[BALANCE_FIELD_KEYS['related_account']]['value'] for r in records}
+        _store_balance_cache(today, cached_synced | existing_accounts | inserted)
     else:
-        print(f"  ✗ Balance sync failed: {resp.status_code}")
+        print("  ✗ Balance sync failed")
+
+
+
+def _load_txn_cache():
+    """Load the id -> signature checkpoint of already-synced transactions"""
+    try:
+        with open(TXN_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_txn_cache(cache):
+    """Atomically persist the transaction checkpoint"""
+    tmp = TXN_CACHE_FILE + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp, TXN_CACHE_FILE)
 
 
 def sync_transactions(transactions, account_map):
@@ -804,66 +1070,89 @@ def sync_transactions(transactions, account_map):
     print("STEP 5: SYNC TRANSACTIONS TO QUICKBASE")
     print("=" * 60)
     
-    records = []
+    # Preallocate at the known upper bound and trim - avoids list-growth
+    # reallocations on large transaction sets
+    records = [None] * len(transactions)
+    write_idx = 0
     skipped = 0
-    
+    unchanged = 0
+
+    # Rows whose content signature matches the local checkpoint were
+    # already upserted - skip them so incremental runs only POST deltas
+    seen = _load_txn_cache()
+    new_sigs = {}
+
+    # Resolve field-id keys once - the loop body then emits a single dict
+    # literal per record instead of 8 dict lookups + str() calls each
+    f_qb_id = TRANSACTION_FIELD_KEYS['quickbooks_id']
+    f_internal = TRANSACTION_FIELD_KEYS['internal_id']
+    f_date = TRANSACTION_FIELD_KEYS['date']
+    f_desc = TRANSACTION_FIELD_KEYS['description']
+    f_amount = TRANSACTION_FIELD_KEYS['amount']
+    f_type = TRANSACTION_FIELD_KEYS['type']
+    f_merchant = TRANSACTION_FIELD_KEYS['merchant_name']
+    f_related = TRANSACTION_FIELD_KEYS['related_account']
+
     for t in transactions:
         parent_record_id = account_map.get(str(t['account_id']))
-        
+
         if not parent_record_id:
             skipped += 1
             continue
-        
+
+        sig = f"{t['date']}|{t['amount']}|{t['merchant_name']}|{t['type']}"
+        if seen.get(t['olb_txn_id']) == sig:
+            unchanged += 1
+            continue
+
         # Extract numeric part of ID if it contains non-numeric chars
-        internal_id = t['id']
-        if internal_id:
-            numeric_part = ''.join(c for c in str(internal_id).split(':')[0] if c.isdigit())
-            internal_id = int(numeric_part) if numeric_part else 0
-        else:
-            internal_id = 0
-        
-        records.append({
-            str(TRANSACTION_FIELDS['quickbooks_id']): {'value': t['olb_txn_id']},
-            str(TRANSACTION_FIELDS['internal_id']): {'value': internal_id},
-            str(TRANSACTION_FIELDS['date']): {'value': t['date']},
-            str(TRANSACTION_FIELDS['description']): {'value': t['description']},
-            str(TRANSACTION_FIELDS['amount']): {'value': t['amount']},
-            str(TRANSACTION_FIELDS['type']): {'value': t['type']},
-            str(TRANSACTION_FIELDS['merchant_name']): {'value': t['merchant_name']},
-            str(TRANSACTION_FIELDS['related_account']): {'value': parent_record_id},
-        })
+        m = _NUM_RE.match(str(t['id'])) if t['id'] else None
+        internal_id = int(m.group()) if m else 0
+
+        records[write_idx] = {
+            f_qb_id: {'value': t['olb_txn_id']},
+            f_internal: {'value': internal_id},
+            f_date: {'value': t['date']},
+            f_desc: {'value': t['description']},
+            f_amount: {'value': t['amount']},
+            f_type: {'value': t['type']},
+            f_merchant: {'value': t['merchant_name']},
+            f_related: {'value': parent_record_id},
+        }
+        write_idx += 1
+        new_sigs[t['olb_txn_id']] = sig
+    
+    del records[write_idx:]
     
     if skipped:
         print(f"  Skipped {skipped} transactions (no matching account)")
+    if unchanged:
+        print(f"  Skipped {unchanged} unchanged transactions (checkpoint)")
     
     if not records:
         print("  No transactions to sync")
         return
     
-    # Batch in chunks of 1000
-    batch_size = 1000
-    total_created = 0
-    total_updated = 0
-    
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
-        print(f"  Upserting batch {i // batch_size + 1}: {len(batch)} transactions...")
-        
-        resp = quickbase_request('POST', 'records', {
-            'to': TRANSACTIONS_TABLE_ID,
-            'data': batch,
-            'mergeFieldId': TRANSACTION_FIELDS['quickbooks_id'],
-        })
-        
-        if resp.status_code == 200:
-            meta = resp.json().get('metadata', {})
-            total_created += len(meta.get('createdRecordIds', []))
-            total_updated += len(meta.get('updatedRecordIds', []))
-        else:
-            print(f"    Batch error: {resp.status_code}")
-    
-    print(f"\n  Total created: {total_created}")
-    print(f"  Total updated: {total_updated}")
+    n_slices = -(-len(records) // UPSERT_CHUNK)
+    print(f"  Upserting {len(records)} transactions in {n_slices} slice(s)...")
+
+    ok, result = quickbase_upsert_chunked({
+        'to': TRANSACTIONS_TABLE_ID,
+        'data': records,
+        'mergeFieldId': TRANSACTION_FIELDS['quickbooks_id'],
+    })
+
+    if not ok:
+        print("    ⚠️  One or more slices failed")
+    else:
+        # Checkpoint only after every slice landed, so a partial failure
+        # re-sends those rows next run
+        seen.update(new_sigs)
+        _store_txn_cache(seen)
+
+    meta = result.get('metadata', {})
+    print(f"\n  Total created: {len(meta.get('createdRecordIds', []))}")
+    print(f"  Total updated: {len(meta.get('updatedRecordIds', []))}")
 
 
 # =============================================================================
@@ -885,21 +1174,23 @@ def run_gl_sync():
     try:
         # Import the OAuth sync module
         from qb_to_quickbase_sync import (
-            load_config, TokenStore, QBOAuth, QuickBaseClient, SyncEngine
+            get_config, get_token_store, QBOAuth, QuickBaseClient, SyncEngine
         )
     except ImportError:
         print("  ⚠️  qb_to_quickbase_sync.py not found in path")
         print("  Make sure it's in the same directory or PYTHONPATH")
         return False
     
-    config = load_config()
+    # Cached singletons - repeated GL syncs in one process skip the
+    # config/token re-reads
+    config = get_config()
     if not config:
         print("  ⚠️  GL sync config not found. Set environment variables:")
         print("      QB_CLIENT_ID, QB_CLIENT_SECRET, QUICKBASE_REALM,")
         print("      QUICKBASE_TOKEN, QUICKBASE_APP_ID")
         return False
     
-    token_store = TokenStore()
+    token_store = get_token_store()
     tokens = token_store.get_all()
     
     if not tokens:
@@ -1081,16 +1372,29 @@ Examples:
             print("\n  Waiting 5 seconds before scraping...")
             time.sleep(5)
     
-    # Scrape and sync bank data
-    accounts, transactions = scrape_quickbooks(cookies)
-    account_map = sync_accounts(accounts)
-    
-    # Sync bank balances (daily snapshot)
-    if not args.skip_balances:
-        sync_bank_balances(accounts, account_map)
-    
-    # Sync transactions
-    sync_transactions(transactions, account_map)
+    # Scrape and sync bank data. The accounts upsert only needs the accounts
+    # list, so run it in the background while transactions are scraped -
+    # both phases are network-bound and overlap cleanly.
+    accounts = fetch_accounts(cookies)
+
+    with ThreadPoolExecutor(max_workers=1) as upsert_pool:
+        account_map_future = upsert_pool.submit(sync_accounts, accounts)
+
+        transactions = scrape_transactions(cookies, accounts)
+
+        # Propagates a failed account sync instead of silently carrying
+        # on with an empty map
+        account_map = account_map_future.result()
+
+    # Balances and transactions are independent once account_map exists -
+    # run both uploads in parallel over the shared pooled session
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = []
+        if not args.skip_balances:
+            futures.append(pool.submit(sync_bank_balances, accounts, account_map))
+        futures.append(pool.submit(sync_transactions, transactions, account_map))
+        for future in futures:
+            future.result()
     
     print("\n" + "=" * 60)
     print("✓ BANK FEEDS SYNC COMPLETE")
@@ -12,17 +12,25 @@ Usage:
 """
 
 import os
+import gzip
 import json
 import time
 import logging
+import threading
 import requests
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter, Retry
 from datetime import datetime, timedelta, timezone
 
 # Helper for timezone-aware UTC datetime
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
+def utc_now_iso() -> str:
+    """Current UTC time as 'YYYY-MM-DDTHH:MM:SSZ' (isoformat beats strftime)"""
+    return utc_now().replace(microsecond=0, tzinfo=None).isoformat() + 'Z'
+
 def parse_datetime(dt_str: str) -> datetime:
     """Parse ISO datetime string, making it timezone-aware if needed"""
     dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
@@ -31,10 +39,26 @@ def parse_datetime(dt_str: str) -> datetime:
     return dt
 from pathlib import Path
 from urllib.parse import urlencode, parse_qs, urlparse
-from typing import Optional, Dict, List, Any
-from dataclasses import dataclass, asdict
+from typing import Optional, Dict, List, Any, Tuple, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
 import base64
 
+# orjson (C extension) serializes several times faster than stdlib json;
+# fall back to stdlib when it is not installed
+try:
+    import orjson
+
+    def _json_dumps(data) -> bytes:
+        return orjson.dumps(data)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data) -> bytes:
+        return json.dumps(data).encode()
+
+    _json_loads = json.loads
+
 # Load .env file if present (before any config access)
 try:
     from dotenv import load_dotenv
@@ -69,6 +93,14 @@ QB_ENTITIES = [
     "Vendor",
 ]
 
+# Upsert batch size (rows per POST). Throughput typically peaks well
+# below 1000 rows for upsert APIs; tune per deployment with QB_BATCH_SIZE
+# or --batch-size using the per-batch timings in the log.
+BATCH_SIZE = int(os.environ.get('QB_BATCH_SIZE', '400'))
+# Refresh tokens this close to expiry before syncing rather than racing
+# a mid-sync 401
+REFRESH_LEAD_SECONDS = int(os.environ.get('QB_REFRESH_LEAD_SECONDS', '60'))
+
 # Local paths
 CONFIG_DIR = Path.home() / ".qb_quickbase_sync"
 TOKEN_FILE = CONFIG_DIR / "tokens.json"
@@ -93,6 +125,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# =============================================================================
+# Errors
+# =============================================================================
+
+class QuickBaseError(Exception):
+    """Raised when a QuickBase API call fails after retries"""
+
 # =============================================================================
 # Data Classes
 # =============================================================================
@@ -129,6 +168,8 @@ class TokenStore:
         self.token_file = token_file
         self.token_file.parent.mkdir(parents=True, exist_ok=True)
         self._tokens: Dict[str, QBToken] = {}
+        self._lock = threading.Lock()
+        self._last_saved = None
         self._load()
     
     def _load(self):
@@ -145,10 +186,21 @@ class TokenStore:
                 self._tokens = {}
     
     def _save(self):
-        """Save tokens to disk"""
-        data = {realm_id: asdict(token) for realm_id, token in self._tokens.items()}
-        with open(self.token_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Save tokens to disk (atomic, skipped when nothing changed)"""
+        # QBToken holds only flat strings - __dict__ avoids asdict's
+        # deep-copy machinery on every save
+        data = {realm_id: token.__dict__ for realm_id, token in self._tokens.items()}
+        serialized = json.dumps(data, indent=2)
+        if serialized == self._last_saved:
+            return
+        
+        # Write-then-rename so concurrent refreshes never leave a torn
+        # or clobbered tokens file
+        tmp_file = self.token_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            f.write(serialized)
+        os.replace(tmp_file, self.token_file)
+        self._last_saved = serialized
     
     def get(self, realm_id: str) -> Optional[QBToken]:
         """Get token for a specific company"""
@@ -160,15 +212,17 @@ class TokenStore:
     
     def save_token(self, token: QBToken):
         """Save or update a token"""
-        self._tokens[token.realm_id] = token
-        self._save()
+        with self._lock:
+            self._tokens[token.realm_id] = token
+            self._save()
         logger.info(f"Saved token for {token.company_name} ({token.realm_id})")
     
     def remove(self, realm_id: str):
         """Remove a token"""
-        if realm_id in self._tokens:
-            del self._tokens[realm_id]
-            self._save()
+        with self._lock:
+            if realm_id in self._tokens:
+                del self._tokens[realm_id]
+                self._save()
 
 # =============================================================================
 # OAuth Handler
@@ -181,6 +235,28 @@ class QBOAuth:
         self.client_id = client_id
         self.client_secret = client_secret
         self.token_store = token_store
+        # Pooled session shared by OAuth calls and the QB API clients -
+        # avoids a fresh TCP+TLS handshake per request, with retries on
+        # transient failures
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=32, pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 500, 502, 503, 504],
+                              allowed_methods=frozenset(['GET', 'POST']),
+                              respect_retry_after_header=True)))
+        # One refresh lock per realm: Intuit rotates the refresh token on
+        # every grant, so two concurrent refreshes for the same realm
+        # would burn a rotation for nothing (and can invalidate one side)
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+        self._refresh_locks_guard = threading.Lock()
+    
+    def _refresh_lock(self, realm_id: str) -> threading.Lock:
+        with self._refresh_locks_guard:
+            lock = self._refresh_locks.get(realm_id)
+            if lock is None:
+                lock = self._refresh_locks[realm_id] = threading.Lock()
+            return lock
     
     def get_auth_url(self) -> str:
         """Generate OAuth authorization URL"""
@@ -243,7 +319,7 @@ class QBOAuth:
             f"{self.client_id}:{self.client_secret}".encode()
         ).decode()
         
-        response = requests.post(
+        response = self._session.post(
             QB_TOKEN_URL,
             headers={
                 'Authorization': f'Basic {auth_header}',
@@ -261,7 +337,7 @@ class QBOAuth:
             logger.error(f"Token exchange failed: {response.text}")
             return None
         
-        data = response.json()
+        data = _json_loads(response.content)
         now = utc_now()
         
         # Get company name
@@ -285,7 +361,7 @@ class QBOAuth:
     def _get_company_name(self, access_token: str, realm_id: str) -> Optional[str]:
         """Fetch company name from QB API"""
         try:
-            response = requests.get(
+            response = self._session.get(
                 f"{QB_API_BASE}/{realm_id}/companyinfo/{realm_id}",
                 headers={
                     'Authorization': f'Bearer {access_token}',
@@ -293,18 +369,33 @@ class QBOAuth:
                 }
             )
             if response.status_code == 200:
-                return response.json().get('CompanyInfo', {}).get('CompanyName')
+                return _json_loads(response.content).get('CompanyInfo', {}).get('CompanyName')
         except Exception as e:
             logger.warning(f"Could not fetch company name: {e}")
         return None
     
     def refresh_token(self, token: QBToken) -> Optional[QBToken]:
-        """Refresh an access token"""
+        """Refresh an access token (deduped per realm).
+        
+        When several workers notice an expiring token at once, the first
+        one does the Intuit round-trip and the rest pick up its result
+        from the store.
+        """
+        with self._refresh_lock(token.realm_id):
+            # Someone else may have refreshed while we waited on the lock
+            stored = self.token_store.get(token.realm_id)
+            if (stored is not None
+                    and stored.access_token != token.access_token
+                    and utc_now() + timedelta(minutes=15) < parse_datetime(stored.access_token_expiry)):
+                return stored
+            return self._refresh_token_locked(token)
+    
+    def _refresh_token_locked(self, token: QBToken) -> Optional[QBToken]:
         auth_header = base64.b64encode(
             f"{self.client_id}:{self.client_secret}".encode()
         ).decode()
         
-        response = requests.post(
+        response = self._session.post(
             QB_TOKEN_URL,
             headers={
                 'Authorization': f'Basic {auth_header}',
@@ -321,7 +412,7 @@ class QBOAuth:
             logger.error(f"Token refresh failed for {token.company_name}: {response.text}")
             return None
         
-        data = response.json()
+        data = _json_loads(response.content)
         now = utc_now()
         
         updated_token = QBToken(
@@ -364,47 +455,115 @@ class QBClient:
     """QuickBooks API client for a single company"""
     
     def __init__(self, token: QBToken, oauth: QBOAuth):
-        self.token = token
         self.oauth = oauth
+        self._session = oauth._session
+        self._token_lock = threading.Lock()
+        self._apply_token(token)
     
-    def _get_headers(self) -> Dict[str, str]:
-        """Get request headers with valid token"""
-        # Check if token needs refresh (without recursion)
-        expiry = parse_datetime(self.token.access_token_expiry)
-        if utc_now() + timedelta(minutes=15) >= expiry:
-            logger.info(f"Token expiring soon for {self.token.company_name}, refreshing...")
-            refreshed = self.oauth.refresh_token(self.token)
-            if refreshed:
-                self.token = refreshed
+    def _apply_token(self, token: QBToken):
+        """Cache the parsed expiry and prebuilt headers for a token.
         
-        return {
-            'Authorization': f'Bearer {self.token.access_token}',
+        _get_headers runs on every request; parsing the ISO expiry and
+        rebuilding the header dict belong here, once per token.
+        """
+        self.token = token
+        self._expiry = parse_datetime(token.access_token_expiry)
+        self._headers = {
+            'Authorization': f'Bearer {token.access_token}',
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         }
     
+    def _get_headers(self) -> Dict[str, str]:
+        """Get request headers with valid token"""
+        # Check if token needs refresh (without recursion). Entity syncs
+        # run concurrently, so serialize the check-and-refresh to avoid
+        # two threads burning the same refresh token.
+        with self._token_lock:
+            if utc_now() + timedelta(minutes=15) >= self._expiry:
+                logger.info(f"Token expiring soon for {self.token.company_name}, refreshing...")
+                refreshed = self.oauth.refresh_token(self.token)
+                if refreshed:
+                    self._apply_token(refreshed)
+            return self._headers
+    
+    def count(self, entity: str, where: str = None) -> Optional[int]:
+        """Count records with SELECT COUNT(*) - one cheap round-trip"""
+        query = f"SELECT COUNT(*) FROM {entity}"
+        if where:
+            query += f" WHERE {where}"
+        
+        url = f"{QB_API_BASE}/{self.token.realm_id}/query"
+        response = self._session.get(url, headers=self._get_headers(),
+                                     params={'query': query})
+        
+        if response.status_code != 200:
+            logger.error(f"Count failed for {entity}: {response.text}")
+            return None
+        
+        return _json_loads(response.content).get('QueryResponse', {}).get('totalCount', 0)
+    
+    def _fetch_page_raw(self, entity: str, select: str, where: str,
+                        max_results: int, start_position: int) -> Dict:
+        """Fetch one STARTPOSITION page, returning the full QueryResponse"""
+        query = f"SELECT {select} FROM {entity}"
+        if where:
+            query += f" WHERE {where}"
+        query += f" STARTPOSITION {start_position} MAXRESULTS {max_results}"
+        
+        url = f"{QB_API_BASE}/{self.token.realm_id}/query"
+        response = self._session.get(url, headers=self._get_headers(),
+                                     params={'query': query})
+        
+        if response.status_code != 200:
+            logger.error(f"Query failed for {entity}: {response.text}")
+            return {}
+        
+        return _json_loads(response.content).get('QueryResponse', {})
+    
+    def _fetch_page(self, entity: str, select: str, where: str,
+                    max_results: int, start_position: int) -> List[Dict]:
+        """Fetch one STARTPOSITION page of a query"""
+        return self._fetch_page_raw(entity, select, where,
+                                    max_results, start_position).get(entity, [])
+    
     def query(self, entity: str, select: str = "*", where: str = None, 
               max_results: int = 1000, start_position: int = 1) -> List[Dict]:
-        """Query QB entity with pagination"""
+        """Query QB entity with pagination.
+        
+        Counts up-front, then fetches every page concurrently instead of
+        walking STARTPOSITION one serial round-trip (plus sleep) at a
+        time - an N-page fetch costs about one page's latency.
+        """
+        total = self.count(entity, where)
+        
+        if total is None:
+            # COUNT unsupported or failed - fall back to the serial walk
+            return self._query_serial(entity, select, where, max_results, start_position)
+        
+        if total < start_position:
+            return []
+        
+        starts = list(range(start_position, total + 1, max_results))
+        if len(starts) == 1:
+            return self._fetch_page(entity, select, where, max_results, starts[0])
+        
+        all_results = []
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for page in pool.map(
+                    lambda sp: self._fetch_page(entity, select, where, max_results, sp),
+                    starts):
+                all_results.extend(page)
+        return all_results
+    
+    def _query_serial(self, entity: str, select: str, where: str,
+                      max_results: int, start_position: int) -> List[Dict]:
+        """Original one-page-at-a-time walk, kept as the fallback path"""
         all_results = []
         
         while True:
-            query = f"SELECT {select} FROM {entity}"
-            if where:
-                query += f" WHERE {where}"
-            query += f" STARTPOSITION {start_position} MAXRESULTS {max_results}"
-            
-            url = f"{QB_API_BASE}/{self.token.realm_id}/query"
-            params = {'query': query}
-            
-            response = requests.get(url, headers=self._get_headers(), params=params)
-            
-            if response.status_code != 200:
-                logger.error(f"Query failed for {entity}: {response.text}")
-                break
-            
-            data = response.json()
-            query_response = data.get('QueryResponse', {})
+            query_response = self._fetch_page_raw(entity, select, where,
+                                                  max_results, start_position)
             entities = query_response.get(entity, [])
             
             if not entities:
@@ -412,20 +571,64 @@ class QBClient:
             
             all_results.extend(entities)
             
-            # Check if more results
-            if len(entities) < max_results:
+            # QBO reports the page's maxResults (and totalCount when
+            # available) - use them to stop without burning a final
+            # empty-page round-trip on exactly-aligned counts
+            page_size = query_response.get('maxResults', len(entities))
+            total = query_response.get('totalCount')
+            if page_size < max_results:
+                break
+            if total is not None and start_position + page_size > total:
                 break
             
             start_position += max_results
-            time.sleep(0.1)  # Rate limiting courtesy
         
         return all_results
     
-    def get_all_entities(self, entity: str) -> List[Dict]:
-        """Get all records for an entity type"""
+    def batch_first_pages(self, entities: List[str], max_results: int = 1000,
+                          where: str = None) -> Optional[Dict[str, Tuple[List[Dict], bool]]]:
+        """Fetch page one of several entity queries in a single POST.
+        
+        QBO's /batch endpoint takes up to 30 operations per call, so the
+        first page of all 14 entity types costs one round-trip instead
+        of 14. Returns {entity: (records, may_have_more)}, or None if
+        the endpoint rejected the call (callers fall back to per-entity
+        queries).
+        """
+        url = f"{QB_API_BASE}/{self.token.realm_id}/batch"
+        where_clause = f" WHERE {where}" if where else ""
+        results = {}
+        
+        for i in range(0, len(entities), 30):
+            chunk = entities[i:i + 30]
+            payload = {'BatchItemRequest': [
+                {'bId': entity,
+                 'Query': f"SELECT * FROM {entity}{where_clause}"
+                          f" STARTPOSITION 1 MAXRESULTS {max_results}"}
+                for entity in chunk
+            ]}
+            
+            response = self._session.post(url, headers=self._get_headers(),
+                                          data=_json_dumps(payload))
+            
+            if response.status_code != 200:
+                logger.error(f"Batch query failed: {response.text}")
+                return None
+            
+            for item in _json_loads(response.content).get('BatchItemResponse', []):
+                entity = item.get('bId')
+                records = (item.get('QueryResponse') or {}).get(entity, [])
+                results[entity] = (records, len(records) >= max_results)
+        
+        return results
+    
+    def get_all_entities(self, entity: str, since: str = None) -> List[Dict]:
+        """Get all records for an entity type, optionally only those
+        updated since the given ISO timestamp"""
         logger.info(f"Fetching {entity} from {self.token.company_name}...")
+        where = f"Metadata.LastUpdatedTime >= '{since}'" if since else None
         try:
-            results = self.query(entity)
+            results = self.query(entity, where=where)
             logger.info(f"  Found {len(results)} {entity} records")
             return results
         except Exception as e:
@@ -776,20 +979,48 @@ class QuickBaseClient:
     
     UNIQUE_KEY_FIELD_NAME = "QB_UniqueKey"
     
-    def __init__(self, realm: str, token: str, app_id: str = None):
+    def __init__(self, realm: str, token: str, app_id: str = None,
+                 batch_size: int = None):
         self.realm = realm
         self.token = token
         self.app_id = app_id or QUICKBASE_SCHEMA['app_id']
+        self.batch_size = batch_size or BATCH_SIZE
         self.base_url = "https://api.quickbase.com/v1"
-        self._entity_record_cache: Dict[str, int] = {}  # realm_id -> record_id
-        self._unique_key_field_cache: Dict[str, int] = {}  # table_id -> field_id
-    
-    def _get_headers(self) -> Dict[str, str]:
-        return {
+        # Headers and endpoint URLs never change for a client instance -
+        # build them once instead of per request
+        self._headers = {
             'QB-Realm-Hostname': f'{self.realm}.quickbase.com',
             'Authorization': f'QB-USER-TOKEN {self.token}',
             'Content-Type': 'application/json'
         }
+        self._records_url = f"{self.base_url}/records"
+        self._query_url = f"{self.base_url}/records/query"
+        self._fields_url = f"{self.base_url}/fields"
+        self._entity_record_cache: Dict[str, int] = {}  # realm_id -> record_id
+        self._entity_last_sync: Dict[str, Optional[str]] = {}  # realm_id -> ISO ts
+        # table_id -> field_id (None cached for tables without the field)
+        self._unique_key_field_cache: Dict[str, Optional[int]] = {}
+        # Shared session reuses TLS connections across batch POSTs; the
+        # semaphore caps in-flight upserts below QuickBase's rate limit
+        # POST retries are safe here: upserts are idempotent under
+        # mergeFieldId, and Retry honors Retry-After on 429/503
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=16, pool_maxsize=16,
+            max_retries=Retry(
+                total=5, backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'POST']),
+                respect_retry_after_header=True)))
+        self._upsert_slots = threading.Semaphore(8)
+        # Entity/unique-key lookups are shared across the company pool;
+        # the lock keeps lookup-then-create atomic so concurrent syncs
+        # never create duplicate entity records
+        self._cache_lock = threading.Lock()
+        # table name -> compiled field plan; see _transform_plan
+        self._transform_plans: Dict[str, tuple] = {}
+        # (table name, record key shape) -> plan filtered to present keys
+        self._shape_plans: Dict[Tuple[str, frozenset], tuple] = {}
     
     def _get_or_create_unique_key_field(self, table_id: str, table_name: str) -> Optional[int]:
         """Find the QB_UniqueKey field for a table (must be created manually in QuickBase)"""
@@ -797,91 +1028,261 @@ class QuickBaseClient:
             return self._unique_key_field_cache[table_id]
         
         # Query existing fields to find QB_UniqueKey
-        response = requests.get(
-            f"{self.base_url}/fields",
-            headers=self._get_headers(),
+        response = self._session.get(
+            self._fields_url,
+            headers=self._headers,
             params={'tableId': table_id}
         )
         
         if response.status_code == 200:
-            for field in response.json():
+            for field in _json_loads(response.content):
                 if field.get('label') == self.UNIQUE_KEY_FIELD_NAME:
                     field_id = field['id']
                     self._unique_key_field_cache[table_id] = field_id
                     logger.info(f"  Found {self.UNIQUE_KEY_FIELD_NAME} field ({field_id}) in {table_name}")
                     return field_id
         
-        # Field not found - log warning and continue without merge
+        # Field not found - log warning and continue without merge.
+        # Cache the miss too, so repeat upserts to the same table don't
+        # re-issue the GET /fields round-trip every time
         logger.warning(f"  {self.UNIQUE_KEY_FIELD_NAME} field not found in {table_name} - records will be inserted (no merge)")
+        self._unique_key_field_cache[table_id] = None
         return None
     
-    def get_or_create_entity(self, realm_id: str, company_name: str) -> int:
-        """Get or create entity record, return QuickBase record ID"""
+    def prime_field_cache(self):
+        """Warm the unique-key field cache for every table whose schema
+        doesn't pin a field id, so the first upserts don't each pay a
+        GET /fields round-trip mid-sync"""
+        missing = [
+            (cfg['table_id'], name)
+            for name, cfg in QUICKBASE_SCHEMA['tables'].items()
+            if not cfg.get('unique_key_field')
+            and cfg['table_id'] not in self._unique_key_field_cache
+        ]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(
+                lambda item: self._get_or_create_unique_key_field(*item),
+                missing))
+
+    def get_or_create_entity(self, realm_id: str, company_name: str) -> Tuple[int, Optional[str]]:
+        """Get or create entity record.
+        
+        Returns (record_id, last_sync_time) - last_sync_time is None for
+        newly created entities, so their first sync is a full fetch.
+        """
+        with self._cache_lock:
+            record_id = self._get_or_create_entity_locked(realm_id, company_name)
+            return record_id, self._entity_last_sync.get(realm_id)
+
+    def _get_or_create_entity_locked(self, realm_id: str, company_name: str) -> int:
         if realm_id in self._entity_record_cache:
             return self._entity_record_cache[realm_id]
         
         table_id = QUICKBASE_SCHEMA['tables']['Entities']['table_id']
         
         # Query for existing entity
-        response = requests.post(
-            f"{self.base_url}/records/query",
-            headers=self._get_headers(),
-            json={
+        response = self._session.post(
+            self._query_url,
+            headers=self._headers,
+            data=_json_dumps({
                 'from': table_id,
-                'select': [3, 7],  # Record ID#, Quickbooks ID
+                'select': [3, 7, 10],  # Record ID#, Quickbooks ID, Last Sync Time
                 'where': f"{{7.EX.'{realm_id}'}}"
-            }
+            })
         )
         
         if response.status_code == 200:
-            data = response.json().get('data', [])
+            data = _json_loads(response.content).get('data', [])
             if data:
                 record_id = data[0]['3']['value']
                 self._entity_record_cache[realm_id] = record_id
+                self._entity_last_sync[realm_id] = data[0].get('10', {}).get('value') or None
                 return record_id
         
         # Create new entity
-        response = requests.post(
-            f"{self.base_url}/records",
-            headers=self._get_headers(),
-            json={
+        response = self._session.post(
+            self._records_url,
+            headers=self._headers,
+            data=_json_dumps({
                 'to': table_id,
                 'data': [{
                     '6': {'value': company_name},
                     '7': {'value': realm_id},
-                    '10': {'value': utc_now().strftime('%Y-%m-%dT%H:%M:%SZ')}
+                    '10': {'value': utc_now_iso()}
                 }]
-            }
+            })
         )
         
         if response.status_code == 200:
-            record_id = response.json()['metadata']['createdRecordIds'][0]
+            record_id = _json_loads(response.content)['metadata']['createdRecordIds'][0]
             self._entity_record_cache[realm_id] = record_id
             logger.info(f"Created entity record for {company_name}: {record_id}")
             return record_id
         else:
             raise Exception(f"Failed to create entity: {response.text}")
     
-    def update_entity_sync_time(self, realm_id: str):
-        """Update last sync time for entity"""
-        if realm_id not in self._entity_record_cache:
+    def update_entity_sync_times(self, updates: List[Tuple[str, str]]):
+        """Write Last Sync Time for several realms in one POST.
+        
+        updates holds (realm_id, sync_time) pairs; sync_time should be
+        the timestamp captured when that realm's sync *started* so
+        records updated mid-sync are picked up by the next delta.
+        """
+        data = [
+            {
+                '3': {'value': self._entity_record_cache[realm_id]},
+                '10': {'value': sync_time}
+            }
+            for realm_id, sync_time in updates
+            if realm_id in self._entity_record_cache
+        ]
+        if not data:
             return
         
-        record_id = self._entity_record_cache[realm_id]
         table_id = QUICKBASE_SCHEMA['tables']['Entities']['table_id']
-        
-        requests.post(
-            f"{self.base_url}/records",
-            headers=self._get_headers(),
-            json={
-                'to': table_id,
-                'data': [{
-                    '3': {'value': record_id},
-                    '10': {'value': utc_now().strftime('%Y-%m-%dT%H:%M:%SZ')}
-                }]
-            }
+        self._session.post(
+            self._records_url,
+            headers=self._headers,
+            data=_json_dumps({'to': table_id, 'data': data})
         )
     
+    def _post_batch(self, payload: Dict, table_name: str) -> Optional[Dict]:
+        """POST one upsert batch through the shared session (rate-capped).
+
+        Returns created/updated counts, or None if the batch failed even
+        after the adapter's retries.
+        """
+        body = _json_dumps(payload)
+        headers = self._headers
+        # Repeated field-id keys compress 5-10x; worth the CPU once the
+        # body is big enough for wire time to dominate
+        if len(body) > 16_384:
+            body = gzip.compress(body, compresslevel=4)
+            headers = {**headers, 'Content-Encoding': 'gzip'}
+        
+        with self._upsert_slots:
+            t0 = time.perf_counter()
+            response = self._session.post(
+                self._records_url,
+                headers=headers,
+                data=body
+            )
+            elapsed = time.perf_counter() - t0
+        logger.info(f"  Batch of {len(payload['data'])} -> {table_name}: "
+                    f"{response.status_code} in {elapsed:.2f}s")
+
+        if response.status_code == 200:
+            metadata = _json_loads(response.content).get('metadata', {})
+            return {
+                'created': len(metadata.get('createdRecordIds', ())),
+                'updated': len(metadata.get('updatedRecordIds', ())),
+            }
+
+        logger.error(f"Upsert failed for {table_name}: {response.text}")
+        return None
+
+    def _upsert_batches(self, table_id: str, records: Iterable[Dict],
+                        unique_key_field_id: Optional[int], table_name: str) -> Dict:
+        """Pack records into batches and POST them in parallel.
+
+        Accepts any iterable, so callers can feed a transform generator
+        and only a bounded window of packed payloads is ever resident.
+        Batches are independent (disjoint records), so the wall time of a
+        multi-batch upsert drops to roughly the slowest batch.
+        """
+        def make_payload(batch):
+            payload = {'to': table_id, 'data': batch}
+            if unique_key_field_id:
+                payload['mergeFieldId'] = unique_key_field_id
+            return payload
+
+        # Pack greedily by serialized size as well as row count - huge
+        # payloads degrade QuickBase's parse latency non-linearly, so a
+        # batch flushes at ~4MB even if it holds fewer than 1000 rows
+        batch_size = self.batch_size
+        byte_budget = 4_000_000
+
+        results = {'created': 0, 'updated': 0}
+        failed = []
+        pending = []
+
+        def collect(payload, future):
+            batch_result = future.result()
+            if batch_result is None:
+                failed.append(payload)
+            else:
+                results['created'] += batch_result['created']
+                results['updated'] += batch_result['updated']
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            def flush(batch):
+                # Submit as soon as a batch is packed, so POSTs overlap
+                # with packing the rest; cap the in-flight window so a
+                # generator feed never materializes the whole table
+                payload = make_payload(batch)
+                pending.append((payload, pool.submit(
+                    self._post_batch, payload, table_name)))
+                if len(pending) >= 16:
+                    collect(*pending.pop(0))
+
+            batch = []
+            batch_bytes = 2  # '[]'
+            for record in records:
+                record_bytes = len(_json_dumps(record)) + 1
+                if batch and (len(batch) >= batch_size
+                              or batch_bytes + record_bytes > byte_budget):
+                    flush(batch)
+                    batch = []
+                    batch_bytes = 2
+                batch.append(record)
+                batch_bytes += record_bytes
+            if batch:
+                flush(batch)
+            for payload, future in pending:
+                collect(payload, future)
+
+        # One serial second pass for batches that failed after adapter
+        # retries - a burst throttle has usually cleared by now, and a
+        # rejected batch is split in half so one poison row can't sink
+        # its 999 neighbours. Records are never silently dropped:
+        # anything still failing raises.
+        still_failed = 0
+        for payload in failed:
+            still_failed += self._split_retry(payload, table_name, results)
+
+        if still_failed:
+            raise QuickBaseError(
+                f"{still_failed} record(s) failed to upsert for {table_name}")
+        return results
+
+    def _split_retry(self, payload: Dict, table_name: str, results: Dict) -> int:
+        """Retry a failed batch, bisecting on rejection down to single
+        records so the one bad row gets logged and everything else lands.
+        
+        Merges successful counts into results; returns the number of
+        records that still failed. Transient 429/5xx are already
+        retried with backoff by the session adapter before we get here.
+        """
+        batch_result = self._post_batch(payload, table_name)
+        if batch_result is not None:
+            results['created'] += batch_result['created']
+            results['updated'] += batch_result['updated']
+            return 0
+        
+        data = payload['data']
+        if len(data) == 1:
+            logger.error(f"Record rejected by {table_name}: {_json_dumps(data[0])!r}")
+            return 1
+        
+        mid = len(data) // 2
+        failed = 0
+        for half in (data[:mid], data[mid:]):
+            failed += self._split_retry({**payload, 'data': half},
+                                        table_name, results)
+        return failed
+
     def upsert_records(self, table_name: str, records: List[Dict], entity_record_id: int, realm_id: str) -> Dict:
         """Upsert records to a QuickBase table
         
@@ -911,63 +1312,60 @@ class QuickBaseClient:
         if not unique_key_field_id:
             unique_key_field_id = self._get_or_create_unique_key_field(table_id, table_name)
         
-        # Transform records
-        qb_records = []
-        for record in records:
-            qb_record = {}
-            
-            # Map QB fields to QuickBase fields
-            for qb_field, fid in qb_mapping.items():
-                value = self._get_nested_value(record, qb_field)
-                if value is not None:
-                    qb_record[str(fid)] = {'value': value}
-            
-            # Add entity relationship
-            if entity_field:
-                qb_record[str(entity_field)] = {'value': entity_record_id}
-            
-            # Add composite unique key: {qb_id}_{realm_id}
-            if unique_key_field_id:
-                qb_id = record.get('Id', '')
-                unique_key = f"{qb_id}_{realm_id}"
-                qb_record[str(unique_key_field_id)] = {'value': unique_key}
-            
-            if qb_record:
-                qb_records.append(qb_record)
-        
-        if not qb_records:
-            return {'created': 0, 'updated': 0}
+        # Field paths and str() field-id keys are compiled once per table -
+        # the per-record loop then only does lookups and dict stores
+        plan = self._transform_plan(table_name, qb_mapping)
+        entity_key = str(entity_field) if entity_field else None
+        unique_key_key = str(unique_key_field_id) if unique_key_field_id else None
         
-        # Batch upsert
-        results = {'created': 0, 'updated': 0}
-        batch_size = 1000
+        # Transform lazily - _upsert_batches packs and POSTs as it pulls,
+        # so the full transformed copy never sits in memory alongside the
+        # raw records
+        shape_plans = self._shape_plans
         
-        for i in range(0, len(qb_records), batch_size):
-            batch = qb_records[i:i + batch_size]
-            
-            payload = {
-                'to': table_id,
-                'data': batch,
-            }
-            
-            # Use unique key field for merge if available
-            if unique_key_field_id:
-                payload['mergeFieldId'] = unique_key_field_id
-            
-            response = requests.post(
-                f"{self.base_url}/records",
-                headers=self._get_headers(),
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                metadata = response.json().get('metadata', {})
-                results['created'] += metadata.get('createdRecordIds', []).__len__()
-                results['updated'] += metadata.get('updatedRecordIds', []).__len__()
-            else:
-                logger.error(f"Upsert failed for {table_name}: {response.text}")
+        def transformed():
+            for record in records:
+                qb_record = {}
+                
+                # Records of one entity type mostly share a key shape -
+                # cache the plan filtered to present root keys per shape
+                # so absent fields aren't probed record after record
+                shape = frozenset(record)
+                shape_key = (table_name, shape)
+                record_plan = shape_plans.get(shape_key)
+                if record_plan is None:
+                    record_plan = tuple(
+                        entry for entry in plan if entry[0] in shape)
+                    shape_plans[shape_key] = record_plan
+                
+                # Map QB fields to QuickBase fields
+                for top, rest, key in record_plan:
+                    value = record.get(top)
+                    for part in rest:
+                        if not isinstance(value, dict):
+                            value = None
+                            break
+                        value = value.get(part)
+                    if value is not None:
+                        qb_record[key] = {'value': value}
+                
+                # Nothing mapped: don't ship a row holding only the
+                # entity link and unique key
+                if not qb_record:
+                    continue
+                
+                # Add entity relationship
+                if entity_key:
+                    qb_record[entity_key] = {'value': entity_record_id}
+                
+                # Add composite unique key: {qb_id}_{realm_id}
+                if unique_key_key:
+                    qb_record[unique_key_key] = {'value': f"{record.get('Id', '')}_{realm_id}"}
+                
+                yield qb_record
         
-        return results
+        # Batch upsert (parallel batches through the shared session)
+        return self._upsert_batches(table_id, transformed(), unique_key_field_id, table_name)
     
     def upsert_line_items(self, table_name: str, parent_records: List[Dict], 
                           parent_table_name: str, entity_record_id: int, realm_id: str) -> Dict:
@@ -1000,23 +1398,37 @@ class QuickBaseClient:
         parent_record_map = {}
         if parent_ref_field and parent_unique_key_field:
             # Query parent table to get the mapping
-            response = requests.post(
-                f"{self.base_url}/records/query",
-                headers=self._get_headers(),
-                json={
+            response = self._session.post(
+                self._query_url,
+                headers=self._headers,
+                data=_json_dumps({
                     'from': parent_table_id,
                     'select': [3, parent_unique_key_field],  # Record ID# and QB_UniqueKey
-                }
+                })
             )
             
             if response.status_code == 200:
-                for record in response.json().get('data', []):
+                for record in _json_loads(response.content).get('data', []):
                     unique_key = record.get(str(parent_unique_key_field), {}).get('value')
                     record_id = record.get('3', {}).get('value')
                     if unique_key and record_id:
                         parent_record_map[unique_key] = record_id
                 logger.info(f"  Built parent mapping: {len(parent_record_map)} {parent_table_name} records")
         
+        # Resolve str() field-id keys once - the per-line loop below runs
+        # for every line of every parent, so no str()/dict probing there
+        parent_ref_key = str(parent_ref_field) if parent_ref_field else None
+        line_num_key = str(fields['LineNum']) if 'LineNum' in fields else None
+        line_number_key = str(fields['Line Number']) if 'Line Number' in fields else None
+        description_key = str(fields['Description']) if 'Description' in fields else None
+        amount_key = str(fields['Amount']) if 'Amount' in fields else None
+        quantity_key = str(fields['Quantity']) if 'Quantity' in fields else None
+        unit_price_key = str(fields['Unit Price']) if 'Unit Price' in fields else None
+        items_key = str(fields['Items']) if 'Items' in fields else None
+        account_key = str(fields['Account']) if 'Account' in fields else None
+        posting_type_key = str(fields['Posting Type']) if 'Posting Type' in fields else None
+        unique_key_key = str(unique_key_field_id) if unique_key_field_id else None
+        
         # Extract line items
         all_lines = []
         skipped_no_parent = 0
@@ -1041,50 +1453,48 @@ class QuickBaseClient:
                 line_num = line.get('LineNum', idx)
                 
                 # Link to parent via Record ID# (numeric)
-                if parent_ref_field and parent_record_id:
-                    line_record[str(parent_ref_field)] = {'value': parent_record_id}
+                if parent_ref_key and parent_record_id:
+                    line_record[parent_ref_key] = {'value': parent_record_id}
                 
                 # Common line fields
-                if 'LineNum' in fields:
-                    line_record[str(fields['LineNum'])] = {'value': line_num}
-                if 'Line Number' in fields:
-                    line_record[str(fields['Line Number'])] = {'value': line_num}
-                if 'Description' in fields:
-                    line_record[str(fields['Description'])] = {'value': line.get('Description')}
-                if 'Amount' in fields:
-                    line_record[str(fields['Amount'])] = {'value': line.get('Amount')}
+                if line_num_key:
+                    line_record[line_num_key] = {'value': line_num}
+                if line_number_key:
+                    line_record[line_number_key] = {'value': line_num}
+                if description_key:
+                    line_record[description_key] = {'value': line.get('Description')}
+                if amount_key:
+                    line_record[amount_key] = {'value': line.get('Amount')}
                 
                 # Invoice-specific (SalesItemLineDetail)
                 detail = line.get('SalesItemLineDetail', {})
                 if detail:
-                    if 'Quantity' in fields:
-                        line_record[str(fields['Quantity'])] = {'value': detail.get('Qty')}
-                    if 'Unit Price' in fields:
-                        line_record[str(fields['Unit Price'])] = {'value': detail.get('UnitPrice')}
-                    if 'Items' in fields:
+                    if quantity_key:
+                        line_record[quantity_key] = {'value': detail.get('Qty')}
+                    if unit_price_key:
+                        line_record[unit_price_key] = {'value': detail.get('UnitPrice')}
+                    if items_key:
                         item_ref = detail.get('ItemRef', {})
-                        line_record[str(fields['Items'])] = {'value': item_ref.get('name')}
+                        line_record[items_key] = {'value': item_ref.get('name')}
                 
-                # Bill line-specific (AccountBasedExpenseLineDetail or ItemBasedExpenseLineDetail)
+                # Bill line-specific (AccountBasedExpenseLineDetail)
                 acct_detail = line.get('AccountBasedExpenseLineDetail', {})
-                item_detail = line.get('ItemBasedExpenseLineDetail', {})
-                if acct_detail and 'Account' in fields:
+                if acct_detail and account_key:
                     acct_ref = acct_detail.get('AccountRef', {})
-                    line_record[str(fields['Account'])] = {'value': acct_ref.get('name')}
+                    line_record[account_key] = {'value': acct_ref.get('name')}
                 
                 # JournalEntry-specific (JournalEntryLineDetail)
                 je_detail = line.get('JournalEntryLineDetail', {})
                 if je_detail:
-                    if 'Posting Type' in fields:
-                        line_record[str(fields['Posting Type'])] = {'value': je_detail.get('PostingType')}
-                    if 'Account' in fields:
+                    if posting_type_key:
+                        line_record[posting_type_key] = {'value': je_detail.get('PostingType')}
+                    if account_key:
                         acct_ref = je_detail.get('AccountRef', {})
-                        line_record[str(fields['Account'])] = {'value': acct_ref.get('name')}
+                        line_record[account_key] = {'value': acct_ref.get('name')}
                 
                 # Add composite unique key: {parent_id}_{line_num}_{realm_id}
-                if unique_key_field_id:
-                    unique_key = f"{parent_id}_{line_num}_{realm_id}"
-                    line_record[str(unique_key_field_id)] = {'value': unique_key}
+                if unique_key_key:
+                    line_record[unique_key_key] = {'value': f"{parent_id}_{line_num}_{realm_id}"}
                 
                 if line_record:
                     all_lines.append(line_record)
@@ -1092,50 +1502,36 @@ class QuickBaseClient:
         if skipped_no_parent:
             logger.warning(f"  Skipped {skipped_no_parent} parents (not found in QuickBase)")
         
+        # Colliding unique keys (duplicate LineNum, idx fallback reuse)
+        # would all merge into one QuickBase row anyway - dedupe here,
+        # last wins, so the collisions don't ride the wire
+        if unique_key_key:
+            deduped = list({line[unique_key_key]['value']: line
+                            for line in all_lines}.values())
+            if len(deduped) < len(all_lines):
+                logger.info(f"  Deduped {len(all_lines) - len(deduped)} "
+                            f"colliding {table_name} line keys")
+            all_lines = deduped
+        
         if not all_lines:
             return {'created': 0, 'updated': 0}
         
-        # Upsert lines
-        results = {'created': 0, 'updated': 0}
-        batch_size = 1000
-        
-        for i in range(0, len(all_lines), batch_size):
-            batch = all_lines[i:i + batch_size]
-            
-            payload = {
-                'to': table_id,
-                'data': batch
-            }
-            
-            # Use unique key field for merge if available
-            if unique_key_field_id:
-                payload['mergeFieldId'] = unique_key_field_id
-            
-            response = requests.post(
-                f"{self.base_url}/records",
-                headers=self._get_headers(),
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                metadata = response.json().get('metadata', {})
-                results['created'] += len(metadata.get('createdRecordIds', []))
-                results['updated'] += len(metadata.get('updatedRecordIds', []))
-            else:
-                logger.error(f"Line item upsert failed for {table_name}: {response.text}")
-        
-        return results
+        # Upsert lines (parallel batches through the shared session)
+        return self._upsert_batches(table_id, all_lines, unique_key_field_id, table_name)
     
-    def _get_nested_value(self, obj: Dict, path: str) -> Any:
-        """Get nested value from dict using dot notation (e.g., 'PrimaryEmailAddr.Address')"""
-        parts = path.split('.')
-        current = obj
-        for part in parts:
-            if isinstance(current, dict):
-                current = current.get(part)
-            else:
-                return None
-        return current
+    def _transform_plan(self, table_name: str, qb_mapping: Dict[str, int]) -> tuple:
+        """Compile a table's qb_mapping into (top_key, rest_parts, field_id_key)
+        triples so the hot transform loop never re-splits dotted paths."""
+        plan = self._transform_plans.get(table_name)
+        if plan is None:
+            plan = tuple(
+                (parts[0], tuple(parts[1:]), str(fid))
+                for qb_field, fid in qb_mapping.items()
+                for parts in (qb_field.split('.'),)
+            )
+            self._transform_plans[table_name] = plan
+        return plan
+
 
 
 # =============================================================================
@@ -1174,8 +1570,14 @@ class SyncEngine:
         self.oauth = oauth
         self.qb_client = qb_client
     
-    def sync_entity(self, client: QBClient, qb_entity: str, entity_record_id: int, realm_id: str):
-        """Sync a single entity type from one QB company to QuickBase"""
+    def sync_entity(self, client: QBClient, qb_entity: str, entity_record_id: int,
+                    realm_id: str, records: List[Dict] = None, since: str = None):
+        """Sync a single entity type from one QB company to QuickBase.
+        
+        records may be pre-fetched (batch first pages); when None they
+        are fetched here, restricted to rows updated since `since` when
+        a prior sync time is known.
+        """
         
         table_name = self.QB_TO_TABLE.get(qb_entity)
         if not table_name:
@@ -1183,7 +1585,8 @@ class SyncEngine:
             return
         
         # Fetch from QuickBooks
-        records = client.get_all_entities(qb_entity)
+        if records is None:
+            records = client.get_all_entities(qb_entity, since=since)
         if not records:
             return
         
@@ -1216,37 +1619,106 @@ class SyncEngine:
         
         logger.info(f"Starting sync for {len(tokens)} companies, {len(qb_entities)} entity types")
         
-        for realm_id, token in tokens.items():
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Syncing: {token.company_name} ({realm_id})")
-            logger.info(f"{'='*60}")
-            
-            # Get or create entity record in QuickBase
-            try:
-                entity_record_id = self.qb_client.get_or_create_entity(realm_id, token.company_name)
-            except Exception as e:
-                logger.error(f"Failed to get/create entity record: {e}")
-                continue
-            
-            client = QBClient(token, self.oauth)
-            
-            for qb_entity in qb_entities:
-                try:
-                    self.sync_entity(client, qb_entity, entity_record_id, realm_id)
-                except Exception as e:
-                    logger.error(f"Error syncing {qb_entity}: {e}")
-                    continue
-            
-            # Update sync timestamp
-            self.qb_client.update_entity_sync_time(realm_id)
+        # One pass over field metadata up front instead of lazy lookups
+        # racing inside the company pool
+        self.qb_client.prime_field_cache()
+        
+        # Companies are independent token + API streams - sync them
+        # concurrently too, bounded so the aggregate request rate stays
+        # under Intuit's per-app throttle. One failing company only
+        # loses its own sync.
+        company_workers = int(os.environ.get('QB_COMPANY_WORKERS', '4'))
+        with ThreadPoolExecutor(max_workers=company_workers) as company_pool:
+            completed = [
+                result for result in company_pool.map(
+                    lambda item: self._sync_company(item[0], item[1], qb_entities),
+                    tokens.items())
+                if result is not None
+            ]
+        
+        # One POST covers every realm's sync-time stamp instead of a
+        # round-trip each
+        self.qb_client.update_entity_sync_times(completed)
         
         logger.info("\nSync complete!")
+    
+    def _sync_company(self, realm_id: str, token: QBToken,
+                      qb_entities: List[str]) -> Optional[Tuple[str, str]]:
+        """Sync every entity type for one company.
+        
+        Returns (realm_id, sync_started) when every entity type made it
+        through, so sync_all can batch the Last Sync Time writes; None
+        on any failure.
+        """
+        logger.info(f"\n{'='*60}")
+        logger.info(f"Syncing: {token.company_name} ({realm_id})")
+        logger.info(f"{'='*60}")
+        
+        # Get or create entity record in QuickBase
+        try:
+            entity_record_id, last_sync = self.qb_client.get_or_create_entity(
+                realm_id, token.company_name)
+        except Exception as e:
+            logger.error(f"Failed to get/create entity record: {e}")
+            return
+        
+        client = QBClient(token, self.oauth)
+        
+        # Only fetch rows QuickBooks changed since the last successful
+        # sync - on steady state this shrinks the workload to the delta.
+        # Stamp the start time now so anything updated mid-sync falls
+        # into the next window.
+        where = f"Metadata.LastUpdatedTime >= '{last_sync}'" if last_sync else None
+        if where:
+            logger.info(f"Incremental sync since {last_sync}")
+        sync_started = utc_now_iso()
+        
+        # One batched POST covers page one of every entity; only entity
+        # types whose first page came back full need further pagination
+        try:
+            first_pages = client.batch_first_pages(qb_entities, where=where)
+        except Exception as e:
+            logger.error(f"Batch first-page fetch failed: {e}")
+            first_pages = None
+        
+        # Entity types are independent request/response workloads -
+        # fetch and upsert them concurrently instead of one by one.
+        # 8 workers stays within Intuit's per-realm rate cap.
+        def _sync_one(qb_entity):
+            try:
+                records = None
+                if first_pages is not None and qb_entity in first_pages:
+                    records, may_have_more = first_pages[qb_entity]
+                    if may_have_more:
+                        records = records + client.query(
+                            qb_entity, where=where, start_position=len(records) + 1)
+                    logger.info(f"Fetching {qb_entity} from {client.token.company_name}...")
+                    logger.info(f"  Found {len(records)} {qb_entity} records")
+                self.sync_entity(client, qb_entity, entity_record_id, realm_id,
+                                 records=records, since=last_sync)
+                return True
+            except Exception as e:
+                logger.error(f"Error syncing {qb_entity}: {e}")
+                return False
+        
+        entity_workers = int(os.environ.get('QB_ENTITY_WORKERS', '8'))
+        with ThreadPoolExecutor(max_workers=entity_workers) as pool:
+            all_ok = all(list(pool.map(_sync_one, qb_entities)))
+        
+        # Advance the sync timestamp only when every entity type made it
+        # through - a failed delta would otherwise be skipped forever
+        if all_ok:
+            return realm_id, sync_started
+        logger.warning(
+            f"Not advancing Last Sync Time for {token.company_name}: "
+            f"at least one entity sync failed")
+        return None
 
 # =============================================================================
 # Configuration Management
 # =============================================================================
 
-def load_config() -> Optional[Config]:
+def load_config(require_quickbase: bool = True) -> Optional[Config]:
     """Load configuration from environment variables or config file
     
     Environment variables (preferred):
@@ -1256,7 +1728,11 @@ def load_config() -> Optional[Config]:
         QUICKBASE_TOKEN     - QuickBase user token
         QUICKBASE_APP_ID    - QuickBase app ID
     
-    Falls back to ~/.qb_quickbase_sync/config.json if env vars not set
+    Falls back to ~/.qb_quickbase_sync/config.json if env vars not set.
+    
+    require_quickbase=False only validates the OAuth credentials -
+    enough for --list/--add-company/--refresh-all, which never touch
+    QuickBase.
     """
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     
@@ -1269,9 +1745,13 @@ def load_config() -> Optional[Config]:
         'quickbase_app_id': os.environ.get('QUICKBASE_APP_ID')
     }
     
-    if all(env_config.values()):
+    oauth_keys = ('client_id', 'client_secret')
+    required = env_config if require_quickbase else {
+        k: env_config[k] for k in oauth_keys}
+    
+    if all(required.values()):
         logger.info("Loaded configuration from environment variables")
-        return Config(**env_config)
+        return Config(**{k: v or '' for k, v in env_config.items()})
     
     # Try config file as fallback
     if CONFIG_FILE.exists():
@@ -1287,13 +1767,24 @@ def load_config() -> Optional[Config]:
         'QUICKBASE_REALM': env_config['quickbase_realm'],
         'QUICKBASE_TOKEN': env_config['quickbase_token'],
         'QUICKBASE_APP_ID': env_config['quickbase_app_id']
-    }.items() if not v]
+    }.items() if not v and (require_quickbase or k.startswith('QB_'))]
     
     if missing_env:
         logger.error(f"Missing environment variables: {', '.join(missing_env)}")
     
     return None
 
+@lru_cache(maxsize=1)
+def get_config() -> Optional[Config]:
+    """Process-wide Config singleton (load_config reads env + disk)"""
+    return load_config()
+
+
+@lru_cache(maxsize=1)
+def get_token_store() -> TokenStore:
+    """Process-wide TokenStore singleton (loads tokens.json once)"""
+    return TokenStore()
+
 # =============================================================================
 # CLI
 # =============================================================================
@@ -1301,9 +1792,12 @@ def load_config() -> Optional[Config]:
 def main():
     import argparse
     
+    # fromfile_prefix_chars lets ops wrap flags in a file and run
+    # 'python qb_to_quickbase_sync.py @prod.conf'
     parser = argparse.ArgumentParser(
         description='QuickBooks to QuickBase Sync',
         formatter_class=argparse.RawDescriptionHelpFormatter,
+        fromfile_prefix_chars='@',
         epilog="""
 Environment Variables (required):
   QB_CLIENT_ID        QuickBooks OAuth Client ID
@@ -1334,12 +1828,26 @@ Examples:
     parser.add_argument('--list', action='store_true', help='List connected companies')
     parser.add_argument('--refresh-all', action='store_true', help='Refresh all tokens')
     parser.add_argument('--entities', nargs='+', help='Specific entities to sync')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help=f'Records per upsert POST (default: {BATCH_SIZE}, env QB_BATCH_SIZE)')
     parser.add_argument('--dry-run', action='store_true', help='Show what would sync without syncing')
+    parser.add_argument('--config', type=Path, default=None,
+                        help=f'JSON config file (default: {CONFIG_FILE})')
     
     args = parser.parse_args()
     
+    # --list/--add-company/--refresh-all never touch QuickBase, so don't
+    # demand QuickBase credentials just to read the token store
+    needs_quickbase = args.sync or not any(
+        [args.add_company, args.list, args.refresh_all])
+    
     # Load config from env vars (or fallback to config file)
-    config = load_config()
+    if args.config:
+        with open(args.config, 'r') as f:
+            config = Config(**json.load(f))
+        logger.info(f"Loaded configuration from {args.config}")
+    else:
+        config = load_config(require_quickbase=needs_quickbase)
     if not config:
         print("\nConfiguration not found. Set environment variables:")
         print("  export QB_CLIENT_ID='your_client_id'")
@@ -1387,10 +1895,15 @@ Examples:
     
     # Sync (default action if no flags)
     if args.sync or not any([args.add_company, args.list, args.refresh_all]):
+        # Refresh near-expiry tokens up front - cheaper than hitting the
+        # expiry mid-sync and paying a 401 + retry on the critical path
+        oauth.refresh_all_expiring(hours_threshold=REFRESH_LEAD_SECONDS / 3600)
+        
         qb_client = QuickBaseClient(
             realm=config.quickbase_realm,
             token=config.quickbase_token,
-            app_id=config.quickbase_app_id
+            app_id=config.quickbase_app_id,
+            batch_size=args.batch_size
         )
         
         engine = SyncEngine(oauth, qb_client)
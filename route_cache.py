@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+On-Disk Cache for Static Browser Assets
+
+Browser contexts start with an empty HTTP cache, so every launch
+re-downloads the same QBO JS/CSS bundles. This module gives the
+Playwright route handlers a tiny persistent cache keyed by URL:
+
+    cached = route_cache.load(url)        # (headers, body) or None
+    route_cache.save(url, headers, body)  # no-op for no-store/private
+
+Entries live under ~/.cache/qbo (override with QB_ROUTE_CACHE_DIR) as a
+sha1(url)-named body file plus a JSON sidecar with the response headers
+worth replaying. Writes are atomic (tmp + os.replace) so a crashed run
+can't leave a truncated bundle behind.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv('QB_ROUTE_CACHE_DIR', Path.home() / '.cache' / 'qbo'))
+
+# Response headers that matter when replaying a cached asset
+_KEEP_HEADERS = ('content-type', 'etag', 'cache-control')
+
+
+def _entry_paths(url: str):
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return CACHE_DIR / f'{digest}.json', CACHE_DIR / f'{digest}.bin'
+
+
+def load(url: str):
+    """Return (headers, body) for a cached URL, or None on miss"""
+    meta_path, body_path = _entry_paths(url)
+    try:
+        with open(meta_path, 'r') as f:
+            headers = json.load(f)['headers']
+        with open(body_path, 'rb') as f:
+            return headers, f.read()
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save(url: str, headers: dict, body: bytes) -> None:
+    """Cache a response body unless its Cache-Control forbids it"""
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return
+
+    meta_path, body_path = _entry_paths(url)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    tmp = body_path.with_suffix('.bin.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(body)
+    os.replace(tmp, body_path)
+
+    kept = {k: v for k, v in headers.items() if k.lower() in _KEEP_HEADERS}
+    tmp = meta_path.with_suffix('.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'url': url, 'headers': kept}, f)
+    os.replace(tmp, meta_path)
@@ -19,18 +19,23 @@ Environment Variables Required:
 
 import os
 import sys
-import json
+import atexit
 import logging
+from logging.handlers import MemoryHandler
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from dataclasses import asdict
 
-import requests
-
-# Configure logging
+# Configure logging. Records buffer in memory and flush to stdout in
+# blocks of 100 (immediately on ERROR and at shutdown) - one write()
+# syscall per block instead of per line, which adds up under journald
+_log_target = logging.StreamHandler(sys.stdout)
+_log_target.setFormatter(logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
+    handlers=[MemoryHandler(capacity=100, flushLevel=logging.ERROR,
+                            target=_log_target)]
 )
 logger = logging.getLogger('qb_scraper')
 
@@ -42,9 +47,26 @@ QUICKBASE_TOKEN = os.getenv('QUICKBASE_TOKEN')
 QUICKBASE_TABLE_ID = os.getenv('QUICKBASE_TABLE_ID')
 ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
 
+# Alerts go out on a background thread - a slow or dead webhook must not
+# add its timeout to the run's wall time. Drained at exit so nothing is
+# lost on the failure paths that alert right before returning.
+_ALERT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert')
+atexit.register(_ALERT_POOL.shutdown)
+
+
+def _post_alert(payload: dict):
+    # Imported here so cold start doesn't pay for requests (urllib3,
+    # certifi, charset_normalizer) when no webhook is configured
+    import requests
+    
+    try:
+        requests.post(ALERT_WEBHOOK_URL, json=payload, timeout=10)
+    except Exception as e:
+        logger.error(f"Failed to send alert: {e}")
+
 
 def send_alert(title: str, message: str, severity: str = 'warning'):
-    """Send alert via Teams/Slack webhook"""
+    """Send alert via Teams/Slack webhook (fire-and-forget)"""
     if not ALERT_WEBHOOK_URL:
         logger.warning(f"Alert (no webhook): {title} - {message}")
         return
@@ -64,10 +86,7 @@ def send_alert(title: str, message: str, severity: str = 'warning'):
         }]
     }
     
-    try:
-        requests.post(ALERT_WEBHOOK_URL, json=payload, timeout=10)
-    except Exception as e:
-        logger.error(f"Failed to send alert: {e}")
+    _ALERT_POOL.submit(_post_alert, payload)
 
 
 def run():
@@ -127,11 +146,8 @@ def run():
         
         logger.info(f"✓ Scraped {len(transactions)} transactions from {len(accounts)} accounts")
         
-        # Log breakdown by account
-        by_account = {}
-        for t in transactions:
-            key = t.account_name or t.account_id
-            by_account[key] = by_account.get(key, 0) + 1
+        # Log breakdown by account (Counter tallies the iterator in C)
+        by_account = Counter(t.account_name or t.account_id for t in transactions)
         
         for acct, count in sorted(by_account.items()):
             logger.info(f"    {acct}: {count} pending")
@@ -9,14 +9,34 @@ import sys
 import time
 import csv
 import random
+from concurrent.futures import ThreadPoolExecutor
+
 from playwright.sync_api import sync_playwright
 import requests
+from requests.adapters import HTTPAdapter
+
+# orjson parses the large transaction payloads several times faster than
+# stdlib json; fall back quietly when it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json as _json
+    _json_loads = _json.loads
 
 QB_USERNAME = os.getenv('QB_USERNAME')
 QB_PASSWORD = os.getenv('QB_PASSWORD')
 
 QB_API_KEY = 'prdakyresxaDrhFXaSARXaUdj1S8M7h6YK7YGekc'
 QB_BASE_URL = 'https://qbo.intuit.com'
+STATE_FILE = os.getenv('QB_STATE_FILE', 'qb_state.json')
+
+# Login-form selectors, hoisted so both the selector strings and their
+# parsed form are shared across waits
+SEL_EMAIL = '[data-testid="IdentifierFirstInternationalUserIdInput"]'
+SEL_EMAIL_SUBMIT = '[data-testid="IdentifierFirstSubmitButton"]'
+SEL_PASSWORD = 'input[type="password"]:not([data-testid="SignInHiddenInput"])'
+SEL_SUBMIT = 'button[type="submit"]'
 
 
 def human_delay(min_sec=1, max_sec=3):
@@ -35,25 +55,30 @@ def login():
             headless=False,
             args=['--disable-blink-features=AutomationControlled']
         )
-        context = browser.new_context(
+        # Reuse a saved session when one exists - a valid Intuit cookie
+        # jar lands straight on /app/ and skips the typed login entirely
+        ctx_kwargs = dict(
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15',
             viewport={'width': 1280, 'height': 800},
             locale='en-US',
             timezone_id='America/Denver'
         )
+        if os.path.exists(STATE_FILE):
+            ctx_kwargs['storage_state'] = STATE_FILE
+            print(f"Loaded saved session from {STATE_FILE}")
+        context = browser.new_context(**ctx_kwargs)
         page = context.new_page()
         
         print("Navigating to QB...")
         page.goto('https://qbo.intuit.com', timeout=60000)
-        human_delay(3, 5)
+        # Event-driven wait instead of a fixed sleep - returns the
+        # moment the page is ready
+        page.wait_for_load_state('domcontentloaded')
         
         if 'qbo.intuit.com/app/' not in page.url:
             # Enter email with human-like typing
             print("Entering email...")
-            email_input = page.wait_for_selector(
-                '[data-testid="IdentifierFirstInternationalUserIdInput"]',
-                timeout=15000
-            )
+            email_input = page.wait_for_selector(SEL_EMAIL, timeout=15000)
             human_delay(0.5, 1)
             email_input.click()
             human_delay(0.3, 0.7)
@@ -63,29 +88,32 @@ def login():
             human_delay(0.5, 1.5)
             
             print("Clicking Sign in...")
-            signin_btn = page.query_selector('[data-testid="IdentifierFirstSubmitButton"]')
+            signin_btn = page.query_selector(SEL_EMAIL_SUBMIT)
             if signin_btn:
                 signin_btn.click()
-            human_delay(3, 5)
+            page.wait_for_load_state('domcontentloaded')
+            human_delay(0.5, 1.5)
             
-            # Check for CAPTCHA and wait if needed
-            if 'captcha' in page.content().lower() or 'robot' in page.content().lower():
+            # Check for CAPTCHA and wait if needed. A targeted locator
+            # count runs inside the browser - page.content() would
+            # serialize and scan the whole DOM twice
+            captcha = page.locator(
+                'iframe[src*="captcha" i], iframe[src*="recaptcha" i], '
+                '[id*="captcha" i], [data-testid*="captcha" i]')
+            if captcha.count() > 0:
                 print("\n⚠️  CAPTCHA detected - please solve it manually...")
                 page.wait_for_selector('input[type="password"]', timeout=120000)  # Wait up to 2 min
             
             # Password
             print("Entering password...")
-            password_input = page.wait_for_selector(
-                'input[type="password"]:not([data-testid="SignInHiddenInput"])',
-                timeout=15000
-            )
+            password_input = page.wait_for_selector(SEL_PASSWORD, timeout=15000)
             human_delay(0.5, 1)
             password_input.click()
             human_delay(0.3, 0.7)
             page.keyboard.type(QB_PASSWORD, delay=random.randint(80, 150))
             human_delay(0.5, 1.5)
             
-            signin_btn = page.query_selector('button[type="submit"]')
+            signin_btn = page.query_selector(SEL_SUBMIT)
             if signin_btn:
                 signin_btn.click()
             
@@ -93,9 +121,11 @@ def login():
             page.wait_for_url('**/qbo.intuit.com/app/**', timeout=60000)
         
         # Go to banking
-        human_delay(2, 4)
         page.goto('https://qbo.intuit.com/app/banking', timeout=30000)
-        human_delay(3, 5)
+        try:
+            page.wait_for_load_state('networkidle', timeout=15000)
+        except Exception:
+            pass  # idle is best-effort; cookies are set by now
         
         # Get cookies
         cookies = {}
@@ -105,6 +135,13 @@ def login():
         
         print(f"✓ Logged in. Company ID: {cookies.get('qbo.currentcompanyid')}")
         
+        # Persist the session so the next run can skip the login form
+        try:
+            context.storage_state(path=STATE_FILE)
+            print(f"Session saved to {STATE_FILE}")
+        except Exception as e:
+            print(f"Could not save session: {e}")
+        
         browser.close()
         return cookies
 
@@ -123,7 +160,6 @@ def scrape(cookies):
         'Authorization': f'Intuit_APIKey intuit_apikey={QB_API_KEY}, intuit_apikey_version=1.0',
         'authType': 'browser_auth',
         'Content-Type': 'application/json',
-        'Cookie': '; '.join(f'{k}={v}' for k, v in cookies.items()),
         'intuit-company-id': company_id,
         'Referer': f'{QB_BASE_URL}/app/banking',
     }
@@ -131,11 +167,19 @@ def scrape(cookies):
     if cookies.get('qbo.csrftoken'):
         headers['Csrftoken'] = cookies['qbo.csrftoken']
     
+    # Pooled session: one TLS handshake, keep-alive reused across the
+    # per-account fetches below
+    session = requests.Session()
+    session.headers.update(headers)
+    # The jar formats the Cookie header per request with proper quoting -
+    # safer than hand-joining values that may contain ';' or spaces
+    session.cookies = requests.cookies.cookiejar_from_dict(cookies)
+    session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+    
     # Get accounts
     print("Fetching accounts...")
-    resp = requests.get(
+    resp = session.get(
         f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getInitialData',
-        headers=headers,
         timeout=30
     )
     
@@ -143,21 +187,28 @@ def scrape(cookies):
         print(f"ERROR: {resp.status_code} - {resp.text[:200]}")
         return [], []
     
-    data = resp.json()
+    data = _json_loads(resp.content)
     accounts = data.get('accounts', [])
     print(f"Found {len(accounts)} accounts")
     
-    # Scrape transactions for each account
-    all_transactions = []
+    if not accounts:
+        return accounts, []
     
-    for acct in accounts:
+    # Scrape transactions for each account - accounts are independent,
+    # so fetch them in parallel and pay roughly one RTT instead of N
+    def _fetch_account(acct):
         acct_id = str(acct.get('qboAccountId', ''))
         acct_name = acct.get('qboAccountFullName') or acct.get('olbAccountNickname', 'Unknown')
         pending_count = acct.get('numTxnToReview', 0)
         
+        # getInitialData already told us there's nothing to review -
+        # skip the round-trip for an empty list
+        if pending_count == 0:
+            return acct_id, acct_name, []
+        
         print(f"  Scraping: {acct_name} ({pending_count} pending)...")
         
-        resp = requests.get(
+        resp = session.get(
             f'{QB_BASE_URL}/api/neo/v1/company/{company_id}/olb/ng/getTransactions',
             params={
                 'accountId': acct_id,
@@ -165,31 +216,35 @@ def scrape(cookies):
                 'reviewState': 'PENDING',
                 'ignoreMatching': 'false'
             },
-            headers={**headers, 'X-Range': 'items=0-199'},
+            headers={'X-Range': 'items=0-199'},
             timeout=30
         )
         
         if resp.status_code != 200:
-            print(f"    ERROR: {resp.status_code}")
-            continue
-        
-        items = resp.json().get('items', [])
-        print(f"    Got {len(items)} transactions")
+            print(f"    ERROR: {resp.status_code} ({acct_name})")
+            return acct_id, acct_name, []
         
-        for item in items:
-            amount = float(item.get('amount', 0))
-            all_transactions.append({
-                'id': item.get('id', ''),
-                'olb_txn_id': str(item.get('olbTxnId', '')),
-                'date': item.get('olbTxnDate', '')[:10] if item.get('olbTxnDate') else '',
-                'description': item.get('description', ''),
-                'amount': abs(amount),
-                'type': 'spent' if amount < 0 else 'received',
-                'account_id': acct_id,
-                'account_name': acct_name,
-                'merchant_name': item.get('merchantName', ''),
-                'suggested_category': item.get('suggestedCategory', {}).get('name', '') if item.get('suggestedCategory') else '',
-            })
+        items = _json_loads(resp.content).get('items', [])
+        print(f"    Got {len(items)} transactions ({acct_name})")
+        return acct_id, acct_name, items
+    
+    all_transactions = []
+    with ThreadPoolExecutor(max_workers=min(8, len(accounts))) as pool:
+        for acct_id, acct_name, items in pool.map(_fetch_account, accounts):
+            for item in items:
+                amount = float(item.get('amount', 0))
+                all_transactions.append({
+                    'id': item.get('id', ''),
+                    'olb_txn_id': str(item.get('olbTxnId', '')),
+                    'date': item.get('olbTxnDate', '')[:10] if item.get('olbTxnDate') else '',
+                    'description': item.get('description', ''),
+                    'amount': abs(amount),
+                    'type': 'spent' if amount < 0 else 'received',
+                    'account_id': acct_id,
+                    'account_name': acct_name,
+                    'merchant_name': item.get('merchantName', ''),
+                    'suggested_category': item.get('suggestedCategory', {}).get('name', '') if item.get('suggestedCategory') else '',
+                })
     
     return accounts, all_transactions
 
@@ -200,13 +255,15 @@ def export_csv(accounts, transactions):
     print("STEP 3: EXPORT CSV")
     print("="*60)
     
+    # writerows with a generator + 1MB buffer: one C-level loop and a
+    # handful of write() syscalls instead of one per row
     accounts_file = 'qb_accounts.csv'
-    with open(accounts_file, 'w', newline='') as f:
+    with open(accounts_file, 'w', newline='', buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(['account_id', 'account_name', 'nickname', 'institution', 'type', 
                         'bank_balance', 'qbo_balance', 'pending_txns', 'last_updated', 'account_number'])
-        for a in accounts:
-            writer.writerow([
+        writer.writerows(
+            (
                 a.get('qboAccountId', ''),
                 a.get('qboAccountFullName', ''),
                 a.get('olbAccountNickname', ''),
@@ -217,20 +274,24 @@ def export_csv(accounts, transactions):
                 a.get('numTxnToReview', 0),
                 a.get('lastUpdateTime', ''),
                 a.get('olbAccountNumber', ''),
-            ])
+            )
+            for a in accounts
+        )
     print(f"✓ Wrote {len(accounts)} accounts to {accounts_file}")
     
     txn_file = 'qb_transactions.csv'
-    with open(txn_file, 'w', newline='') as f:
+    with open(txn_file, 'w', newline='', buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(['id', 'olb_txn_id', 'date', 'description', 'amount', 'type', 
                         'account_id', 'account_name', 'merchant_name', 'suggested_category'])
-        for t in transactions:
-            writer.writerow([
+        writer.writerows(
+            (
                 t['id'], t['olb_txn_id'], t['date'], t['description'], t['amount'],
                 t['type'], t['account_id'], t['account_name'], t['merchant_name'],
                 t['suggested_category']
-            ])
+            )
+            for t in transactions
+        )
     print(f"✓ Wrote {len(transactions)} transactions to {txn_file}")
     
     return accounts_file, txn_file
@@ -11,6 +11,12 @@ from playwright.sync_api import sync_playwright
 QB_USERNAME = os.getenv('QB_USERNAME')
 QB_PASSWORD = os.getenv('QB_PASSWORD')
 
+# Login-form selectors, hoisted to module level
+SEL_EMAIL = '[data-testid="IdentifierFirstInternationalUserIdInput"]'
+SEL_EMAIL_SUBMIT = '[data-testid="IdentifierFirstSubmitButton"]'
+SEL_PASSWORD = 'input[type="password"]:not([data-testid="SignInHiddenInput"])'
+SEL_SUBMIT = 'button[type="submit"]'
+
 def test_login(headless=True):
     print(f"Testing login for: {QB_USERNAME}")
     print(f"Headless: {headless}")
@@ -28,7 +34,7 @@ def test_login(headless=True):
         
         print("[1] Navigating to qbo.intuit.com...")
         page.goto('https://qbo.intuit.com', timeout=60000)
-        time.sleep(5)
+        page.wait_for_load_state('domcontentloaded')
         
         print(f"    URL: {page.url}")
         
@@ -41,37 +47,31 @@ def test_login(headless=True):
             if account_tile:
                 print("[2] Found remembered account - clicking...")
                 account_tile.click()
-                time.sleep(2)
+                page.wait_for_load_state('domcontentloaded')
             else:
                 print("[2] Entering email...")
-                email_input = page.wait_for_selector(
-                    '[data-testid="IdentifierFirstInternationalUserIdInput"]',
-                    timeout=10000
-                )
+                email_input = page.wait_for_selector(SEL_EMAIL, timeout=10000)
                 email_input.click()
                 time.sleep(0.5)
                 page.keyboard.type(QB_USERNAME, delay=50)
                 time.sleep(0.5)
                 
                 print("    Clicking Sign in...")
-                signin_btn = page.query_selector('[data-testid="IdentifierFirstSubmitButton"]')
+                signin_btn = page.query_selector(SEL_EMAIL_SUBMIT)
                 if signin_btn:
                     signin_btn.click()
-                time.sleep(3)
+                page.wait_for_load_state('domcontentloaded')
             
             # Password
             print("[3] Entering password...")
             try:
-                password_input = page.wait_for_selector(
-                    'input[type="password"]:not([data-testid="SignInHiddenInput"])',
-                    timeout=10000
-                )
+                password_input = page.wait_for_selector(SEL_PASSWORD, timeout=10000)
                 password_input.click()
                 time.sleep(0.5)
                 page.keyboard.type(QB_PASSWORD, delay=50)
                 time.sleep(0.5)
                 
-                signin_btn = page.query_selector('button[type="submit"]')
+                signin_btn = page.query_selector(SEL_SUBMIT)
                 if signin_btn:
                     signin_btn.click()
                 
@@ -89,7 +89,10 @@ def test_login(headless=True):
         # Banking page
         print("[5] Going to Banking...")
         page.goto('https://qbo.intuit.com/app/banking', timeout=30000)
-        time.sleep(3)
+        try:
+            page.wait_for_load_state('networkidle', timeout=15000)
+        except Exception:
+            pass  # idle is best-effort; cookies are set by now
         
         cookies = {c['name']: c['value'] for c in context.cookies() if 'intuit.com' in c.get('domain', '')}
         